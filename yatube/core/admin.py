@@ -0,0 +1,44 @@
+from django.contrib import admin
+
+from .models import SlowQuery
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'short_sql',
+        'view_name',
+        'count',
+        'average_time',
+        'max_time',
+        'last_seen',
+    )
+    list_filter = ('view_name',)
+    search_fields = ('normalized_sql', 'view_name', 'origin')
+    readonly_fields = (
+        'normalized_sql',
+        'example_sql',
+        'params_fingerprint',
+        'view_name',
+        'origin',
+        'plan',
+        'count',
+        'total_time',
+        'max_time',
+        'first_seen',
+        'last_seen',
+    )
+    exclude = ('fingerprint',)
+
+    def short_sql(self, query):
+        return query.normalized_sql[:100]
+    short_sql.short_description = 'Запрос'
+
+    def average_time(self, query):
+        return f'{query.total_time / query.count:.3f}' if query.count else '-'
+    average_time.short_description = 'Среднее время, с'
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -0,0 +1,51 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from core import timing
+
+TIMED_METHODS = (
+    'add', 'set', 'touch', 'delete', 'has_key', 'incr', 'decr',
+    'set_many', 'delete_many', 'get_or_set', 'clear',
+)
+MISSING = object()
+
+
+def _timed(name):
+    def method(self, *args, **kwargs):
+        with timing.phase('cache'):
+            return getattr(super(TimingMixin, self), name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+class TimingMixin:
+    """Добавляет к кэш-бэкенду замер времени для Server-Timing.
+
+    Чтения еще и считаются попаданиями (cache-hit) и промахами
+    (cache-miss) для метрик.
+    """
+
+    def get(self, key, default=None, version=None):
+        outer = not timing.nested('cache')
+        with timing.phase('cache'):
+            value = super().get(key, MISSING, version)
+        if outer:
+            timing.count('cache-miss' if value is MISSING else 'cache-hit')
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        outer = not timing.nested('cache')
+        with timing.phase('cache'):
+            values = super().get_many(keys, version)
+        if outer:
+            timing.count('cache-hit', len(values))
+            timing.count('cache-miss', len(keys) - len(values))
+        return values
+
+
+for _name in TIMED_METHODS:
+    setattr(TimingMixin, _name, _timed(_name))
+
+
+class TimedLocMemCache(TimingMixin, LocMemCache):
+    pass
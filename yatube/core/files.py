@@ -0,0 +1,138 @@
+import mimetypes
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, которые клиент не запретил через q=0."""
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if not float(params[2:]):
+                    continue
+            except ValueError:
+                continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+def file_etag(stat):
+    """ETag из метаданных файла: время изменения и размер, как в nginx."""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает (start, end) включительно, None если заголовок нужно
+    проигнорировать, и False если диапазон невыполним.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class FileRange:
+    """Файл, из которого читается не больше length байт."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_file(request, fullpath, stat, max_age, immutable=False,
+               accel=None, content_type=None, encoding=None):
+    """Отдает файл с ETag, условными запросами и поддержкой Range.
+
+    Если передан accel - пара (заголовок, внутренний путь), - тело файла
+    не читается, отдачу делает фронтовой прокси.
+    """
+    etag = file_etag(stat)
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        if accel is not None:
+            response = HttpResponse(content_type=content_type)
+            response[accel[0]] = accel[1]
+        else:
+            response = file_range_response(
+                request, fullpath, stat.st_size, etag, content_type
+            )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if immutable:
+        patch_cache_control(response, public=True, max_age=max_age,
+                            immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def file_range_response(request, fullpath, size, etag, content_type):
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if header and (if_range is None or if_range == etag):
+        byte_range = parse_range(header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is None:
+        # Без Range отдаем открытый файл целиком: WSGI-сервер сможет
+        # передать его через wsgi.file_wrapper и sendfile.
+        response = FileResponse(open(fullpath, 'rb'),
+                                content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            FileRange(open(fullpath, 'rb'), start, length),
+            status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    return response
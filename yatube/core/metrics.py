@@ -0,0 +1,173 @@
+"""Метрики в формате Prometheus, общие для всех процессов.
+
+Каждый процесс копит счетчики и гистограммы в памяти и не чаще раза в
+METRICS_FLUSH_INTERVAL секунд сбрасывает их в свой файл
+METRICS_DIR/<pid>.json (запись во временный файл и os.replace, так что
+читатель не увидит половину файла). /metrics складывает файлы всех
+процессов. Файлы завершившихся процессов остаются и продолжают входить
+в сумму, поэтому каталог стоит очищать при перезапуске сервиса.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import ratelimit
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+METRICS = {
+    'yatube_requests_total': ('counter', 'Число запросов'),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время обработки запроса'
+    ),
+    'yatube_response_size_bytes': ('histogram', 'Размер ответа'),
+    'yatube_db_queries_total': ('counter', 'Число SQL-запросов'),
+    'yatube_db_duration_seconds_total': (
+        'counter', 'Суммарное время SQL-запросов'
+    ),
+    'yatube_cache_requests_total': ('counter', 'Чтения кэша по результату'),
+    'yatube_ratelimit_fired_total': (
+        'counter', 'Срабатывания ограничений частоты запросов'
+    ),
+}
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        # Ключ -> [счетчики корзин..., сумма, количество].
+        self.histograms = {}
+        self.flushed = 0
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels_key(labels)] += value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, histogram]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        temp = f'{path}.tmp'
+        with open(temp, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temp, path)
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+
+def buckets_for(name):
+    if name == 'yatube_response_size_bytes':
+        return SIZE_BUCKETS
+    return LATENCY_BUCKETS
+
+
+def collect():
+    """Складывает снимки всех процессов."""
+    counters = defaultdict(float)
+    histograms = {}
+    directory = settings.METRICS_DIR
+    if not os.path.isdir(directory):
+        return counters, histograms
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(histogram))
+            for index, value in enumerate(histogram):
+                total[index] += value
+    return counters, histograms
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def exposition():
+    """Текст для Prometheus в формате 0.0.4."""
+    counters, histograms = collect()
+    # Срабатывания лимитов уже считаются в кэше, общем для процессов.
+    for name, count in ratelimit.fired_counts().items():
+        counters['yatube_ratelimit_fired_total', (('name', name),)] = count
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+            continue
+        buckets = buckets_for(name)
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, value in zip(buckets, histogram):
+                lines.append(f'{name}_bucket'
+                             f'{format_labels(labels, [("le", bound)])} '
+                             f'{value}')
+            lines.append(f'{name}_bucket'
+                         f'{format_labels(labels, [("le", "+Inf")])} '
+                         f'{histogram[-1]}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram[-2]}')
+            lines.append(f'{name}_count{format_labels(labels)} '
+                         f'{histogram[-1]}')
+    return '\n'.join(lines) + '\n'
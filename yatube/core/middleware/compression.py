@@ -0,0 +1,114 @@
+import zlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import decorator_from_middleware
+from django.utils.deprecation import MiddlewareMixin
+
+from core.files import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MIN_SIZE = 200
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/xml',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits=31 - поток в формате gzip, а не голый zlib.
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def process(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def compress_sequence(compressor, sequence):
+    """Сжимает потоковый ответ, сбрасывая буфер после каждого куска.
+
+    Клиент получает данные по мере генерации, а не после конца ответа.
+    """
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip в зависимости от Accept-Encoding."""
+
+    def process_response(self, request, response):
+        if response.status_code != 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request)
+        if brotli is not None and 'br' in accepted:
+            encoding, compressor = 'br', BrotliCompressor()
+        elif 'gzip' in accepted:
+            encoding, compressor = 'gzip', GzipCompressor()
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                compressor, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = compressor.process(response.content)
+            content += compressor.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+# Для представлений под cache_page: сжатое тело попадает в кэш,
+# и сжатие выполняется один раз на заполнение кэша, а не на каждый запрос.
+compress_page = decorator_from_middleware(CompressionMiddleware)
@@ -0,0 +1,43 @@
+import time
+
+from core import timing
+from core.metrics import LATENCY_BUCKETS, SIZE_BUCKETS, registry
+
+
+class MetricsMiddleware:
+    """Собирает метрики запроса с меткой по имени URL.
+
+    SQL и кэш берутся из замеров core.timing, поэтому middleware должно
+    стоять сразу после ServerTimingMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = {'view': match.view_name if match else 'unmatched'}
+        registry.inc('yatube_requests_total', {
+            **view,
+            'method': request.method,
+            'status': str(response.status_code),
+        })
+        registry.observe('yatube_request_duration_seconds', view, duration,
+                         LATENCY_BUCKETS)
+        if not response.streaming:
+            registry.observe('yatube_response_size_bytes', view,
+                             len(response.content), SIZE_BUCKETS)
+
+        durations, counts = timing.snapshot()
+        registry.inc('yatube_db_queries_total', view, counts.get('db', 0))
+        registry.inc('yatube_db_duration_seconds_total', view,
+                     durations.get('db', 0))
+        for result in ('hit', 'miss'):
+            registry.inc('yatube_cache_requests_total', {'result': result},
+                         counts.get(f'cache-{result}', 0))
+        registry.flush()
+        return response
@@ -0,0 +1,48 @@
+import cProfile
+
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from core import profiling
+
+
+class ProfilerMiddleware(MiddlewareMixin):
+    """Выполняет представление под cProfile, см. core/profiling.py.
+
+    Стоит последним, чтобы пользователь уже был известен и профиль
+    охватывал только само представление.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = profiling.requested_mode(request)
+        view_name = request.resolver_match.view_name
+        if mode is None:
+            if not profiling.sampled(view_name):
+                return None
+            mode = 'sample'
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(
+            view_func, request, *view_args, **view_kwargs
+        )
+        if callable(getattr(response, 'render', None)):
+            response = profiler.runcall(response.render)
+
+        if mode == 'text':
+            return HttpResponse(
+                profiling.report(profiler),
+                content_type='text/plain; charset=utf-8'
+            )
+        if mode == 'prof':
+            response = HttpResponse(
+                profiling.dump(profiler),
+                content_type='application/octet-stream'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="{view_name.replace(":", "-")}.prof"'
+            )
+            return response
+        filename = profiling.save(profiler, view_name)
+        if mode == 'save':
+            response['X-Profile-File'] = filename
+        return response
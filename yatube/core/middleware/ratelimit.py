@@ -0,0 +1,17 @@
+from django.utils.deprecation import MiddlewareMixin
+
+from core.ratelimit import is_limited, too_many_requests
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """Отклоняет запрос с 429 до вызова представления.
+
+    Срабатывает раньше декораторов представления, то есть до проверки
+    формы и любых запросов к БД, которые делает само представление.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        if is_limited(name, request):
+            return too_many_requests(request, name)
+        return None
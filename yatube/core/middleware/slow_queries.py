@@ -0,0 +1,33 @@
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core import slow_queries
+
+
+class SlowQueryMiddleware:
+    """Записывает медленные запросы, см. core/slow_queries.py.
+
+    Стоит первым: запись в SlowQuery идет уже после ответа, вне оберток
+    замеров, и не попадает ни в журнал, ни в Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_queries.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(slow_queries.wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            queries = slow_queries.stop()
+        if queries:
+            match = request.resolver_match
+            view_name = match.view_name if match else ''
+            slow_queries.record_all(queries, view_name)
+        return response
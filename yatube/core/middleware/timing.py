@@ -0,0 +1,71 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import timing
+
+logger = logging.getLogger('core.timing')
+
+
+def server_timing(durations, counts, total):
+    metrics = [
+        f'{name};dur={duration * 1000:.1f};desc="{counts[name]}"'
+        for name, duration in sorted(durations.items())
+    ]
+    metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+class ServerTimingMiddleware:
+    """Замеряет фазы запроса и отдает их в заголовке Server-Timing.
+
+    В desc каждой метрики - число операций (запросов, рендеров и т. п.).
+    Заголовок получают все при SERVER_TIMING_HEADER и только сотрудники
+    без него: замеры раскрывают внутреннее устройство сайта.
+    При SERVER_TIMING_LOG те же данные пишутся строкой JSON в лог
+    core.timing вместе с именем представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.db_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            durations, counts = timing.stop()
+        total = time.perf_counter() - started
+
+        if settings.SERVER_TIMING_HEADER or is_staff(request):
+            response['Server-Timing'] = server_timing(
+                durations, counts, total
+            )
+        if settings.SERVER_TIMING_LOG:
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'view': match.view_name if match else None,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                **{f'{name}_ms': round(duration * 1000, 1)
+                   for name, duration in durations.items()},
+                **{f'{name}_count': count for name, count in counts.items()},
+            }, ensure_ascii=False))
+        return response
@@ -9,3 +9,29 @@ class CreatModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class SlowQuery(models.Model):
+    """Медленные запросы, сгруппированные по нормализованному SQL."""
+    fingerprint = models.CharField('Отпечаток', max_length=40, unique=True)
+    normalized_sql = models.TextField('Запрос')
+    example_sql = models.TextField('Пример')
+    params_fingerprint = models.CharField('Отпечаток параметров',
+                                          max_length=40)
+    view_name = models.CharField('Представление', max_length=200,
+                                 blank=True, db_index=True)
+    origin = models.CharField('Место вызова', max_length=300, blank=True)
+    plan = models.TextField('План', blank=True)
+    count = models.PositiveIntegerField('Количество', default=0)
+    total_time = models.FloatField('Суммарное время, с', default=0)
+    max_time = models.FloatField('Максимальное время, с', default=0)
+    first_seen = models.DateTimeField('Впервые', auto_now_add=True)
+    last_seen = models.DateTimeField('Последний раз')
+
+    class Meta:
+        ordering = ('-total_time',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return self.normalized_sql[:50]
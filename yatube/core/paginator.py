@@ -0,0 +1,147 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который хранит результат COUNT в кэше по ключу count_key.
+
+    Ключ сбрасывается сигналами при создании и удалении объектов.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 count_timeout=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_timeout = count_timeout
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, self.count_timeout)
+        return count
+
+
+def estimated_rows(model, using):
+    """Оценка числа строк таблицы по статистике БД или None.
+
+    Для SQLite статистику собирает ANALYZE (таблица sqlite_stat1),
+    для PostgreSQL - autovacuum (pg_class.reltuples).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Статистика еще не собиралась.
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator для админки без точного COUNT(*) на каждую страницу.
+
+    Без фильтров число строк берется из статистики БД, с фильтрами -
+    точный COUNT, закэшированный по тексту запроса на
+    ADMIN_COUNT_TIMEOUT секунд.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_rows(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        key = 'admin:count:' + hashlib.md5(
+            str(queryset.query).encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.ADMIN_COUNT_TIMEOUT)
+        return count
+
+
+class ChainedSequence:
+    """Несколько querysets подряд как один список для Paginator.
+
+    parts - пары (queryset, ключ кэша для его COUNT). При срезе запрос
+    идет только к тем частям, в которые попадает страница, поэтому
+    следующие части читаются лишь для глубоких страниц.
+    """
+
+    def __init__(self, parts, count_timeout=None):
+        self.parts = parts
+        self.count_timeout = count_timeout
+
+    def part_count(self, queryset, count_key):
+        if count_key is None:
+            return queryset.count()
+        count = cache.get(count_key)
+        if count is None:
+            count = queryset.count()
+            cache.set(count_key, count, self.count_timeout)
+        return count
+
+    def count(self):
+        return sum(self.part_count(*part) for part in self.parts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('ChainedSequence поддерживает только срезы')
+        start, stop = index.start or 0, index.stop
+        items = []
+        for queryset, count_key in self.parts:
+            if stop is not None and stop <= 0:
+                break
+            count = self.part_count(queryset, count_key)
+            if start < count:
+                end = count if stop is None else min(stop, count)
+                items.extend(queryset[start:end])
+            start = max(start - count, 0)
+            if stop is not None:
+                stop -= count
+        return items
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям, None на месте пропусков."""
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > 1 + on_each_side + on_ends + 1:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
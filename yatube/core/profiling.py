@@ -0,0 +1,59 @@
+"""Профилирование отдельных запросов через cProfile.
+
+Сотрудник может добавить к любому адресу ?profile=<режим> или заголовок
+X-Profile: <режим>:
+    text - вместо страницы вернуть статистику по накопленному времени;
+    prof - скачать файл pstats (открывается в snakeviz, flameprof и т. п.);
+    save - вернуть страницу, а профиль сохранить в PROFILE_DIR, имя файла
+           придет в заголовке X-Profile-File.
+Кроме того, доля PROFILE_SAMPLE_RATES[имя URL] запросов к названным
+представлениям профилируется у всех пользователей и сохраняется на диск.
+"""
+import io
+import marshal
+import os
+import pstats
+import random
+import time
+
+from django.conf import settings
+
+MODES = ('text', 'prof', 'save')
+
+
+def requested_mode(request):
+    mode = request.GET.get('profile') or request.META.get('HTTP_X_PROFILE')
+    if mode not in MODES:
+        return None
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return None
+    return mode
+
+
+def sampled(view_name):
+    rate = settings.PROFILE_SAMPLE_RATES.get(view_name, 0)
+    return rate > 0 and random.random() < rate
+
+
+def save(profiler, view_name):
+    """Пишет профиль в PROFILE_DIR и возвращает имя файла."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    filename = (
+        f'{view_name.replace(":", "-")}-{int(time.time() * 1000)}'
+        f'-{os.getpid()}.prof'
+    )
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, filename))
+    return filename
+
+
+def dump(profiler):
+    """Профиль в формате pstats в виде байтов, как пишет dump_stats."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def report(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(settings.PROFILE_TEXT_LIMIT)
+    return stream.getvalue()
@@ -0,0 +1,205 @@
+"""Публикация событий для потоков Server-Sent Events.
+
+LocalBroker раздает события подписчикам внутри процесса. Событиям он
+не дает id: счетчик был бы свой в каждом процессе и начинался бы заново
+после перезапуска, поэтому Last-Event-ID с ним не работает и пропущенное
+при переподключении не досылается. У каждого
+подписчика своя очередь на SSE_QUEUE_SIZE событий: если клиент не успевает
+их забирать, подписка помечается переполненной и поток закрывается, а
+клиент переподключается с Last-Event-ID.
+
+SQLiteBroker нужен, когда процессов несколько: события пишутся в общий
+файл SSE_BROKER_PATH, фоновый поток каждого процесса читает новые строки
+и раздает их своим подписчикам. Таблица заодно позволяет дослать
+пропущенные события по Last-Event-ID.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue.Queue(settings.SSE_QUEUE_SIZE)
+        self.overflowed = False
+        self.closed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """(id или None, тип, данные) или None, если событий не было."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.connections = 0
+
+    def subscribe(self, channels, last_event_id=None):
+        """Новая подписка или None, если достигнут SSE_MAX_CONNECTIONS."""
+        with self.lock:
+            if self.connections >= settings.SSE_MAX_CONNECTIONS:
+                return None
+            self.connections += 1
+            subscription = Subscription(self, channels)
+            # Под блокировкой: событие не может проскочить между
+            # досылкой пропущенного и регистрацией подписки.
+            for event in self.missed(channels, last_event_id):
+                subscription.put(event)
+            for channel in channels:
+                self.subscribers[channel].add(subscription)
+        return subscription
+
+    def missed(self, channels, last_event_id):
+        """События после last_event_id; локальный брокер их не хранит."""
+        return ()
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self.connections -= 1
+            for channel in subscription.channels:
+                subscribers = self.subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[channel]
+
+    def dispatch(self, event_id, channel, event_type, data):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put((event_id, event_type, data))
+
+    def publish(self, channel, event_type, payload):
+        self.dispatch(None, channel, event_type,
+                      json.dumps(payload, ensure_ascii=False))
+
+
+class SQLiteBroker(LocalBroker):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.local = threading.local()
+        self.poller = None
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, '
+                'type TEXT, data TEXT, created REAL)'
+            )
+            self.last_id = connection.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM events'
+            ).fetchone()[0]
+
+    def connect(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.local.connection = connection
+        return connection
+
+    def publish(self, channel, event_type, payload):
+        with self.connect() as connection:
+            connection.execute(
+                'INSERT INTO events (channel, type, data, created) '
+                'VALUES (?, ?, ?, ?)',
+                (channel, event_type, json.dumps(payload, ensure_ascii=False),
+                 time.time())
+            )
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = super().subscribe(channels, last_event_id)
+        if subscription is not None:
+            self.start_poller()
+        return subscription
+
+    def missed(self, channels, last_event_id):
+        if last_event_id is None:
+            return ()
+        return [
+            (event_id, event_type, data) for event_id, _, event_type, data
+            in self.read(last_event_id, channels)
+        ]
+
+    def read(self, after, channels=None):
+        sql = 'SELECT id, channel, type, data FROM events WHERE id > ?'
+        params = [after]
+        if channels is not None:
+            sql += ' AND channel IN (%s)' % ', '.join('?' * len(channels))
+            params.extend(channels)
+        return self.connect().execute(sql + ' ORDER BY id', params).fetchall()
+
+    def start_poller(self):
+        with self.lock:
+            if self.poller is not None and self.poller.is_alive():
+                return
+            self.poller = threading.Thread(
+                target=self.poll, name='sse-poller', daemon=True
+            )
+            self.poller.start()
+
+    def poll(self):
+        cleaned = time.monotonic()
+        while True:
+            try:
+                self.poll_once()
+            except sqlite3.Error:
+                logger.exception('Не удалось прочитать события SSE')
+            if time.monotonic() - cleaned > settings.SSE_RETENTION:
+                cleaned = time.monotonic()
+                with self.connect() as connection:
+                    connection.execute(
+                        'DELETE FROM events WHERE created < ?',
+                        (time.time() - settings.SSE_RETENTION,)
+                    )
+            time.sleep(settings.SSE_POLL_INTERVAL)
+
+    def poll_once(self):
+        for event_id, channel, event_type, data in self.read(self.last_id):
+            self.last_id = event_id
+            self.dispatch(event_id, channel, event_type, data)
+
+
+brokers = {}
+brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """Брокер процесса, выбранный настройкой SSE_BROKER."""
+    key = (settings.SSE_BROKER, settings.SSE_BROKER_PATH)
+    with brokers_lock:
+        broker = brokers.get(key)
+        if broker is None:
+            if settings.SSE_BROKER == 'sqlite':
+                broker = SQLiteBroker(settings.SSE_BROKER_PATH)
+            else:
+                broker = LocalBroker()
+            brokers[key] = broker
+    return broker
@@ -0,0 +1,108 @@
+"""Ограничение частоты запросов счетчиками в кэше.
+
+Лимиты задаются в settings.RATELIMITS по имени представления:
+    'posts:add_comment': {'rate': '20/m', 'methods': ('POST',)}
+rate - число запросов за период. Период делится на окна по часам
+time.time(), общим для всех процессов, а запросы окна считаются
+атомарными cache.add и cache.incr, так что параллельные запросы не
+проходят сверх лимита. На стыке окон возможен всплеск до двух лимитов.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.RATELIMIT_TRUST_FORWARDED:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def bucket_key(name, request):
+    if request.user.is_authenticated:
+        return f'ratelimit:{name}:user:{request.user.pk}'
+    return f'ratelimit:{name}:ip:{client_ip(request)}'
+
+
+def fired_key(name):
+    return f'ratelimit:fired:{name}'
+
+
+def take_token(key, rate):
+    """Учитывает запрос в текущем окне, False - если лимит исчерпан."""
+    capacity, period = parse_rate(rate)
+    key = f'{key}:{int(time.time() // period)}'
+    cache.add(key, 0, period * 2)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Ключ вытеснили между add и incr.
+        cache.set(key, 1, period * 2)
+        count = 1
+    return count <= capacity
+
+
+def retry_after(rate):
+    """Секунд до начала следующего окна."""
+    period = parse_rate(rate)[1]
+    return max(1, math.ceil(period - time.time() % period))
+
+
+def is_limited(name, request):
+    limit = settings.RATELIMITS.get(name)
+    if not settings.RATELIMIT_ENABLED or limit is None:
+        return False
+    methods = limit.get('methods')
+    if methods and request.method not in methods:
+        return False
+    checked = request.__dict__.setdefault('_ratelimit_checked', set())
+    if name in checked:
+        return False
+    checked.add(name)
+    if take_token(bucket_key(name, request), limit['rate']):
+        return False
+    if cache.add(fired_key(name), 1, None) is False:
+        try:
+            cache.incr(fired_key(name))
+        except ValueError:
+            # Ключ вытеснили между add и incr.
+            cache.set(fired_key(name), 1, None)
+    return True
+
+
+def fired_counts():
+    """Сколько раз срабатывал каждый лимит, см. /metrics."""
+    keys = {fired_key(name): name for name in settings.RATELIMITS}
+    return {
+        keys[key]: count for key, count in cache.get_many(keys).items()
+    }
+
+
+def too_many_requests(request, name):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = retry_after(settings.RATELIMITS[name]['rate'])
+    return response
+
+
+def ratelimit(name):
+    """Декоратор для представлений, которые не описаны в urls по имени."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if is_limited(name, request):
+                return too_many_requests(request, name)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,163 @@
+"""Журнал медленных SQL-запросов.
+
+SlowQueryMiddleware подключает execute_wrapper, который запоминает
+запросы дольше SLOW_QUERY_THRESHOLD секунд вместе с местом вызова в коде
+проекта. После ответа они записываются в SlowQuery: запросы с
+одинаковым нормализованным текстом (литералы, числа и списки IN
+заменены) складываются в одну строку, для новой строки сохраняется план
+EXPLAIN QUERY PLAN.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+state = threading.local()
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+SPACES = re.compile(r'\s+')
+IGNORED_ORIGINS = (
+    os.path.join('core', 'slow_queries.py'),
+    os.path.join('core', 'middleware', ''),
+)
+
+
+def normalize(sql):
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = PLACEHOLDER_LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(value):
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def origin():
+    """Последний кадр стека из кода проекта, а не Django."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if not filename.startswith(base_dir):
+            continue
+        if any(ignored in filename for ignored in IGNORED_ORIGINS):
+            continue
+        relative = os.path.relpath(filename, base_dir)
+        return f'{relative}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def start():
+    state.queries = []
+
+
+def stop():
+    queries = getattr(state, 'queries', None) or []
+    state.queries = None
+    return queries
+
+
+def wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        queries = getattr(state, 'queries', None)
+        if queries is not None and duration >= settings.SLOW_QUERY_THRESHOLD:
+            queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': None if many else params,
+                'duration': duration,
+                'origin': origin(),
+            })
+
+
+def explain(alias, sql, params):
+    connection = connections[alias]
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError as error:
+        return f'EXPLAIN не выполнен: {error}'
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(row[-1] for row in rows)
+    return '\n'.join(row[0] for row in rows)
+
+
+def record(query, view_name):
+    normalized = normalize(query['sql'])
+    key = fingerprint(normalized)
+    now = timezone.now()
+    logger.info('Медленный запрос %.3f с в %s (%s): %s',
+                query['duration'], view_name, query['origin'], normalized)
+    updates = {
+        'count': F('count') + 1,
+        'total_time': F('total_time') + query['duration'],
+        'max_time': Greatest('max_time', query['duration']),
+        'last_seen': now,
+        'view_name': view_name,
+        'origin': query['origin'],
+        'params_fingerprint': fingerprint(repr(query['params'])),
+    }
+    if SlowQuery.objects.filter(fingerprint=key).update(**updates):
+        return
+    plan = explain(query['alias'], query['sql'], query['params'])
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=key,
+                normalized_sql=normalized,
+                example_sql=query['sql'],
+                params_fingerprint=updates['params_fingerprint'],
+                view_name=view_name,
+                origin=query['origin'],
+                plan=plan,
+                count=1,
+                total_time=query['duration'],
+                max_time=query['duration'],
+                last_seen=now,
+            )
+    except IntegrityError:
+        # Ту же строку успел создать другой процесс.
+        SlowQuery.objects.filter(fingerprint=key).update(**updates)
+
+
+def record_all(queries, view_name):
+    """Записывает queries; ошибка БД только журналируется.
+
+    Запись идет после готового ответа, и сбой мониторинга (например,
+    заблокированная БД SQLite) не должен превращать его в 500.
+    """
+    try:
+        for query in queries:
+            record(query, view_name)
+    except DatabaseError:
+        logger.exception('Медленные запросы %s не записаны', view_name)
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .pubsub import get_broker
+
+
+def format_event(event_id, event_type, data):
+    if event_id is None:
+        return f'event: {event_type}\ndata: {data}\n\n'
+    return f'id: {event_id}\nevent: {event_type}\ndata: {data}\n\n'
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Поток событий, освобождающий подписку при закрытии ответа.
+
+    Генератор, который так и не начали читать (HEAD, обрыв до первой
+    порции, ответ отброшен middleware), не выполняет свой finally,
+    а close() ответа сервер вызывает всегда.
+    """
+
+    def __init__(self, subscription):
+        super().__init__(events(subscription),
+                         content_type='text/event-stream')
+        self.subscription = subscription
+
+    def close(self):
+        self.subscription.close()
+        super().close()
+
+
+def events(subscription):
+    """Тело потока: события, пустые комментарии-пульс и завершение.
+
+    Поток закрывается через SSE_MAX_DURATION секунд или при переполнении
+    очереди; браузер сам переподключится с Last-Event-ID.
+    """
+    deadline = time.monotonic() + settings.SSE_MAX_DURATION
+    last_id = 0
+    try:
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+        while time.monotonic() < deadline and not subscription.overflowed:
+            event = subscription.get(timeout=min(
+                settings.SSE_HEARTBEAT, deadline - time.monotonic()
+            ))
+            if event is None:
+                yield ': heartbeat\n\n'
+            elif event[0] is None:
+                yield format_event(*event)
+            elif event[0] > last_id:
+                # Досланное и прочитанное опросом может повториться.
+                last_id = event[0]
+                yield format_event(*event)
+    finally:
+        subscription.close()
+
+
+def stream(request, channels):
+    """Ответ text/event-stream с событиями каналов channels."""
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    subscription = get_broker().subscribe(channels, last_event_id)
+    if subscription is None:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = str(settings.SSE_RETRY_MS // 1000)
+        return response
+    response = EventStreamResponse(subscription)
+    response['Cache-Control'] = 'no-cache'
+    # Иначе nginx копит поток в буфере.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,87 @@
+import gzip
+import io
+import mimetypes
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+    'image/x-icon',
+    'image/vnd.microsoft.icon',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def gzip_compress(data):
+    buffer = io.BytesIO()
+    # mtime=0, чтобы сборка была воспроизводимой.
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хеширует имена статики и сохраняет рядом .gz и .br копии."""
+
+    compressors = (('.gz', gzip_compress),)
+    if brotli is not None:
+        compressors += (('.br', brotli_compress),)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hashed_names = None
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            # collectstatic еще не запускался: отдаем статику как есть.
+            return name
+        return super().stored_name(name)
+
+    def is_hashed(self, name):
+        if self._hashed_names is None:
+            self._hashed_names = set(self.hashed_files.values())
+        return name in self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self._hashed_names = None
+        if dry_run:
+            return
+        for name in paths:
+            for path in {name, self.stored_name(name)}:
+                yield from self.compress(path)
+
+    def compress(self, name):
+        content_type, encoding = mimetypes.guess_type(name)
+        if encoding or not (content_type or '').startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            return
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in self.compressors:
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
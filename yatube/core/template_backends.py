@@ -0,0 +1,27 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from core import timing
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timing.phase('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонный бэкенд Django, замеряющий время рендера.
+
+    Включаемые шаблоны рендерятся внутри движка, поэтому время
+    считается только для шаблона верхнего уровня.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,13 @@
+from django import template
+
+from core.paginator import elided_page_range
+
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page_obj, on_each_side=2):
+    return elided_page_range(
+        page_obj.number, page_obj.paginator.num_pages, on_each_side
+    )
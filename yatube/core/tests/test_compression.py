@@ -0,0 +1,45 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from ..middleware.compression import CompressionMiddleware
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.html = ('<article>' + 'Текстовый пост ' * 50).encode()
+
+    def process(self, response, encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compress_html(self):
+        """HTML сжимается gzip для клиента, который его принимает"""
+        response = self.process(HttpResponse(self.html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.html)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_compress_streaming(self):
+        """Потоковый ответ сжимается по кускам"""
+        response = self.process(
+            StreamingHttpResponse(iter([self.html, self.html]))
+        )
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), self.html * 2)
+
+    def test_skip_small_and_encoded(self):
+        """Короткие и уже сжатые ответы не трогаются"""
+        response = self.process(HttpResponse(b'<p>short</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        encoded = HttpResponse(self.html)
+        encoded['Content-Encoding'] = 'br'
+        response = self.process(encoded)
+        self.assertEqual(response.content, self.html)
+
+    def test_skip_without_accept_encoding(self):
+        """Без Accept-Encoding ответ не сжимается"""
+        response = self.process(HttpResponse(self.html), encoding='')
+        self.assertEqual(response.content, self.html)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.content = bytes(range(256)) * 4
+        for name in ('posts/small.gif', 'cache/ab/cd/abcd.jpg',
+                     'posts/фото 1.gif'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(cls.content)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_media_full_file(self):
+        """Файл отдается целиком с ETag и кэшированием"""
+        response = self.guest_client.get('/media/posts/small.gif')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.guest_client.get(
+            '/media/posts/small.gif', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_media_range(self):
+        """Поддерживаются запросы диапазона"""
+        response = self.guest_client.get(
+            '/media/posts/small.gif', HTTP_RANGE='bytes=10-19'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content[10:20]
+        )
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        response = self.guest_client.get(
+            '/media/posts/small.gif', HTTP_RANGE='bytes=-4'
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content[-4:]
+        )
+        response = self.guest_client.get(
+            '/media/posts/small.gif', HTTP_RANGE='bytes=5000-'
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_media_thumbnail_immutable(self):
+        """Миниатюры кэшируются навсегда"""
+        response = self.guest_client.get('/media/cache/ab/cd/abcd.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_media_not_found(self):
+        """Несуществующий файл и выход за MEDIA_ROOT дают 404"""
+        for url in ('/media/posts/none.gif', '/media/../settings.py'):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected/')
+    def test_media_accel_redirect(self):
+        """Отдача файла делегируется прокси"""
+        response = self.guest_client.get('/media/posts/small.gif')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected/posts/small.gif'
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected/')
+    def test_media_accel_redirect_quoted(self):
+        """Путь с не-ASCII символами кодируется в заголовке"""
+        response = self.guest_client.get('/media/posts/фото 1.gif')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected/posts/%D1%84%D0%BE%D1%82%D0%BE%201.gif'
+        )
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import Registry
+from ..ratelimit import fired_key
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('metrics')
+
+    def scrape(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_counted_per_view(self):
+        """Запросы считаются с меткой имени URL"""
+        name = ('yatube_requests_total'
+                '{method="GET",status="200",view="posts:index"}')
+        before = sample(self.scrape(), name)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = self.scrape()
+        self.assertEqual(sample(text, name), before + 2)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}', text
+        )
+        self.assertGreater(sample(
+            text, 'yatube_cache_requests_total{result="hit"}'
+        ), 0)
+
+    def test_other_processes_summed(self):
+        """Снимки других процессов складываются с текущим"""
+        name = 'yatube_db_queries_total{view="posts:profile"}'
+        before = sample(self.scrape(), name)
+        other = Registry()
+        other.inc('yatube_db_queries_total', {'view': 'posts:profile'}, 7)
+        with open(os.path.join(METRICS_DIR, '999999.json'), 'w') as file:
+            json.dump(other.snapshot(), file)
+        self.addCleanup(os.remove, os.path.join(METRICS_DIR, '999999.json'))
+        self.assertEqual(sample(self.scrape(), name), before + 7)
+
+    def test_histogram_buckets(self):
+        histogram = Registry()
+        histogram.observe('h', {}, 0.25, (0.1, 0.5, 1))
+        histogram.observe('h', {}, 0.5, (0.1, 0.5, 1))
+        self.assertEqual(
+            histogram.snapshot()['histograms'], [['h', (), [0, 2, 2, 0.75, 2]]]
+        )
+
+    def test_only_allowed_ips(self):
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(RATELIMITS={'posts:add_comment': {'rate': '1/m'}})
+    def test_ratelimit_fired_exposed(self):
+        """Срабатывания лимитов видны в /metrics"""
+        cache.set(fired_key('posts:add_comment'), 3, None)
+        self.assertEqual(sample(
+            self.scrape(),
+            'yatube_ratelimit_fired_total{name="posts:add_comment"}'
+        ), 3)
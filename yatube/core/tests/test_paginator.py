@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from ..paginator import (ApproximateCountPaginator, CachedCountPaginator,
+                         elided_page_range)
+
+User = get_user_model()
+
+
+class PaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        """Выводятся края и окно вокруг текущей страницы"""
+        self.assertEqual(
+            elided_page_range(10, 20000),
+            [1, None, 8, 9, 10, 11, 12, None, 20000]
+        )
+        self.assertEqual(
+            elided_page_range(2, 20000), [1, 2, 3, 4, None, 20000]
+        )
+        self.assertEqual(elided_page_range(3, 5), [1, 2, 3, 4, 5])
+
+    def test_count_cached(self):
+        """Количество объектов берется из кэша по ключу"""
+        paginator = CachedCountPaginator(list(range(25)), 10, 'count:test')
+        self.assertEqual(paginator.num_pages, 3)
+        paginator = CachedCountPaginator(list(range(5)), 10, 'count:test')
+        self.assertEqual(paginator.count, 25)
+
+    def test_approximate_count_from_statistics(self):
+        """Без фильтров число строк берется из статистики БД"""
+        User.objects.bulk_create(
+            User(username=f'user{n}') for n in range(5)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        User.objects.bulk_create(
+            User(username=f'late{n}') for n in range(3)
+        )
+        paginator = ApproximateCountPaginator(
+            User.objects.order_by('pk'), 10
+        )
+        self.assertEqual(paginator.count, 5)
+
+    def test_approximate_count_filtered_cached(self):
+        """С фильтром точный COUNT кэшируется по тексту запроса"""
+        User.objects.create(username='first')
+        queryset = User.objects.filter(
+            username__startswith='f'
+        ).order_by('pk')
+        self.assertEqual(ApproximateCountPaginator(queryset, 10).count, 1)
+        User.objects.create(username='fourth')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                ApproximateCountPaginator(queryset, 10).count, 1
+            )
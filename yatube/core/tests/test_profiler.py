@@ -0,0 +1,77 @@
+import marshal
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+PROFILE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILE_DIR=PROFILE_DIR)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:profile', args=(self.user.username,))
+
+    def test_text_report_for_staff(self):
+        """Сотрудник получает статистику вместо страницы"""
+        response = self.staff_client.get(self.url, {'profile': 'text'})
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; charset=utf-8')
+        self.assertIn('cumulative', response.content.decode())
+
+    def test_ignored_for_other_users(self):
+        """Обычный пользователь получает страницу"""
+        response = self.authorized_client.get(self.url, {'profile': 'text'})
+        self.assertTemplateUsed(response, 'posts/profile.html')
+
+    def test_prof_download(self):
+        """Режим prof отдает профиль в формате pstats"""
+        response = self.staff_client.get(self.url, HTTP_X_PROFILE='prof')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIsInstance(marshal.loads(response.content), dict)
+
+    def test_save_and_download(self):
+        """Сохраненный профиль можно скачать по имени из заголовка"""
+        response = self.staff_client.get(self.url, {'profile': 'save'})
+        self.assertTemplateUsed(response, 'posts/profile.html')
+        filename = response['X-Profile-File']
+        self.assertTrue(os.path.isfile(os.path.join(PROFILE_DIR, filename)))
+        download_url = reverse('profile_download', args=(filename,))
+        self.assertEqual(
+            self.staff_client.get(download_url).status_code, 200
+        )
+        self.assertEqual(
+            self.authorized_client.get(download_url).status_code, 302
+        )
+
+    @override_settings(PROFILE_SAMPLE_RATES={'posts:follow_index': 1})
+    def test_sampled_views_written_to_disk(self):
+        """Выбранные представления профилируются у всех пользователей"""
+        before = set(os.listdir(PROFILE_DIR))
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response)
+        created = set(os.listdir(PROFILE_DIR)) - before
+        self.assertEqual(len(created), 1)
+        self.assertTrue(created.pop().startswith('posts-follow_index-'))
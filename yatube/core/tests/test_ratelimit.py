@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+from ..ratelimit import fired_counts
+
+
+@override_settings(RATELIMITS={
+    'posts:add_comment': {'rate': '2/m', 'methods': ('POST',)},
+})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(author=cls.user, text='Текстовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.add_comment_url = reverse(
+            'posts:add_comment', args=[self.post.pk]
+        )
+
+    def test_limit_rejects_with_429(self):
+        """Сверх лимита запрос отклоняется без записи в БД"""
+        for _ in range(2):
+            response = self.authorized_client.post(
+                self.add_comment_url, {'text': 'Комментарий'}
+            )
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(
+            self.add_comment_url, {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(fired_counts(), {'posts:add_comment': 1})
+
+    def test_retry_after_until_next_window(self):
+        """Retry-After - время до следующего окна, а не весь период"""
+        with mock.patch('core.ratelimit.time.time', return_value=6045.0):
+            for _ in range(3):
+                response = self.authorized_client.post(
+                    self.add_comment_url, {'text': 'Комментарий'}
+                )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '15')
+        with mock.patch('core.ratelimit.time.time', return_value=6061.0):
+            response = self.authorized_client.post(
+                self.add_comment_url, {'text': 'Комментарий'}
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_limit_per_user(self):
+        """Лимит считается отдельно для каждого пользователя"""
+        for _ in range(3):
+            self.authorized_client.post(
+                self.add_comment_url, {'text': 'Комментарий'}
+            )
+        other = Client()
+        other.force_login(User.objects.create_user(username='NoName'))
+        response = other.post(self.add_comment_url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_safe_methods_not_limited(self):
+        """Методы вне списка не расходуют токены"""
+        for _ in range(5):
+            self.authorized_client.get(self.add_comment_url)
+        response = self.authorized_client.post(
+            self.add_comment_url, {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import SlowQuery
+from ..slow_queries import normalize
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0)
+class SlowQueryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('posts:profile', args=(self.user.username,))
+
+    def profile_query(self):
+        return SlowQuery.objects.get(
+            normalized_sql__startswith='SELECT "auth_user"',
+            origin__contains='posts/views.py',
+        )
+
+    def test_queries_aggregated_by_shape(self):
+        """Повторный запрос той же формы увеличивает счетчик"""
+        self.client.get(self.url)
+        query = self.profile_query()
+        self.assertEqual(query.count, 1)
+        self.assertEqual(query.view_name, 'posts:profile')
+        self.assertIn('in profile', query.origin)
+        self.client.get(self.url)
+        query.refresh_from_db()
+        self.assertEqual(query.count, 2)
+        self.assertGreaterEqual(query.total_time, query.max_time)
+
+    def test_plan_captured(self):
+        """Для SELECT сохраняется план запроса"""
+        self.client.get(self.url)
+        self.assertIn('auth_user', self.profile_query().plan)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=60)
+    def test_fast_queries_ignored(self):
+        self.client.get(self.url)
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_record_failure_keeps_response(self):
+        """Ошибка записи медленного запроса не ломает ответ"""
+        with mock.patch('core.slow_queries.record',
+                        side_effect=OperationalError('database is locked')), \
+                self.assertLogs('core.slow_queries', 'ERROR'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a IN (%s, %s, %s) AND b = 'x'"
+                      "  LIMIT 10"),
+            'SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?'
+        )
+
+    def test_admin(self):
+        self.client.get(self.url)
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:core_slowquery_changelist')
+        )
+        self.assertContains(response, 'posts:profile')
@@ -0,0 +1,70 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_DIRS=[TEMP_STATIC_DIR],
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'
+    ],
+)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.css = b'.card { margin: 0; }\n' * 100
+        os.makedirs(os.path.join(TEMP_STATIC_DIR, 'css'))
+        with open(os.path.join(TEMP_STATIC_DIR, 'css', 'site.css'), 'wb') as f:
+            f.write(cls.css)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.hashed_name = staticfiles_storage.stored_name('css/site.css')
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """collectstatic сохраняет хешированные и сжатые копии"""
+        self.assertNotEqual(self.hashed_name, 'css/site.css')
+        path = os.path.join(TEMP_STATIC_ROOT, self.hashed_name + '.gz')
+        with gzip.open(path) as file:
+            self.assertEqual(file.read(), self.css)
+
+    def test_static_negotiates_encoding(self):
+        """Сжатая копия отдается клиенту, который ее принимает"""
+        url = '/static/' + self.hashed_name
+        response = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(content)).read(),
+                         self.css)
+
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.css)
+
+    def test_static_unhashed_not_immutable(self):
+        """Файл без хеша в имени не кэшируется навсегда"""
+        response = self.guest_client.get('/static/css/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
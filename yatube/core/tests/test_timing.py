@@ -0,0 +1,101 @@
+import json
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import timing
+from ..middleware.timing import server_timing
+
+User = get_user_model()
+
+
+def parse(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='HasNoName')
+
+    def test_phases_in_header(self):
+        """В заголовке есть SQL, шаблоны, кэш и общее время"""
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        metrics = parse(response['Server-Timing'])
+        self.assertTrue({'db', 'tpl', 'cache', 'total'} <= set(metrics))
+        self.assertEqual(metrics['tpl']['desc'], '"1"')
+        self.assertGreater(int(metrics['db']['desc'].strip('"')), 0)
+
+    def test_thumbnail_phase(self):
+        """Генерация миниатюры попадает в отдельную фазу"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        with override_settings(MEDIA_ROOT=media_root):
+            post = Post.objects.create(
+                author=self.user, text='Пост',
+                image=SimpleUploadedFile('small.gif', small_gif, 'image/gif')
+            )
+            response = self.client.get(
+                reverse('posts:post_detail', args=(post.pk,))
+            )
+        metrics = parse(response['Server-Timing'])
+        self.assertIn('thumb', metrics)
+        self.assertIn('thumb-gen', metrics)
+
+    def test_nested_phase_counted_once(self):
+        """Вложенная фаза того же вида не удваивает время"""
+        timing.start()
+        with timing.phase('cache'):
+            with timing.phase('cache'):
+                pass
+        durations, counts = timing.stop()
+        self.assertEqual(counts, {'cache': 1})
+        self.assertFalse(timing.active())
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_only_for_staff(self):
+        """Без SERVER_TIMING_HEADER замеры видят только сотрудники"""
+        url = reverse('posts:profile', args=(self.user.username,))
+        self.assertFalse(self.client.get(url).has_header('Server-Timing'))
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertTrue(self.client.get(url).has_header('Server-Timing'))
+
+    def test_format(self):
+        self.assertEqual(
+            server_timing({'db': 0.0123}, {'db': 3}, 0.05),
+            'db;dur=12.3;desc="3", total;dur=50.0'
+        )
+
+    @override_settings(SERVER_TIMING_HEADER=False, SERVER_TIMING_LOG=True)
+    def test_log_line(self):
+        """Строка лога содержит имя представления и фазы"""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertIn('db_ms', record)
@@ -0,0 +1,19 @@
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import timing
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail с замером времени для Server-Timing.
+
+    thumb - поиск миниатюры вместе с генерацией, thumb-gen - только
+    генерация отсутствующих миниатюр.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with timing.phase('thumb'):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _create_thumbnail(self, *args, **kwargs):
+        with timing.phase('thumb-gen'):
+            return super()._create_thumbnail(*args, **kwargs)
@@ -0,0 +1,71 @@
+"""Замер фаз запроса для заголовка Server-Timing.
+
+Время копится в thread-local состоянии, которое открывает
+ServerTimingMiddleware. Фазы измеряют обертки: execute_wrapper для SQL,
+шаблонный бэкенд, кэш-бэкенд и бэкенд sorl-thumbnail. Вложенные вызовы
+одной фазы (например, get_many через get) считаются один раз. Фазы
+разных видов могут перекрываться: кэш внутри шаблона попадет и в cache,
+и в tpl.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+state = threading.local()
+
+
+def start():
+    state.durations = defaultdict(float)
+    state.counts = defaultdict(int)
+    state.depth = defaultdict(int)
+
+
+def stop():
+    """Возвращает (длительности в секундах, число операций) по фазам."""
+    durations = getattr(state, 'durations', None)
+    counts = getattr(state, 'counts', None)
+    state.durations = state.counts = state.depth = None
+    return durations or {}, counts or {}
+
+
+def active():
+    return getattr(state, 'durations', None) is not None
+
+
+@contextmanager
+def phase(name):
+    if not active() or state.depth[name]:
+        yield
+        return
+    state.depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Состояние могло быть закрыто внутри фазы.
+        if active():
+            state.durations[name] += time.perf_counter() - started
+            state.counts[name] += 1
+            state.depth[name] -= 1
+
+
+def nested(name):
+    """True внутри уже идущей фазы name."""
+    return active() and state.depth[name] > 0
+
+
+def count(name, value=1):
+    if active():
+        state.counts[name] += value
+
+
+def snapshot():
+    if not active():
+        return {}, {}
+    return dict(state.durations), dict(state.counts)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    with phase('db'):
+        return execute(sql, params, many, context)
@@ -1,4 +1,22 @@
+import mimetypes
+import posixpath
+from urllib.parse import quote
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from .files import accepted_encodings, serve_file
+from .metrics import exposition, registry
+from .ratelimit import client_ip
+
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
 
 
 def page_not_found(request, exception):
@@ -11,3 +29,85 @@ def csrf_failure(request, reasone=''):
 
 def server_error(request):
     return render(request, 'core/500.html')
+
+
+def get_file(root, path):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(root, path))
+        stat = fullpath.stat()
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+    return path, fullpath, stat
+
+
+def media(request, path):
+    path, fullpath, stat = get_file(settings.MEDIA_ROOT, path)
+    # Имена миниатюр sorl - хеш от исходника и параметров,
+    # содержимое по такому адресу никогда не меняется.
+    immutable = path.startswith(settings.MEDIA_IMMUTABLE_PREFIXES)
+    accel = None
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # Заголовок - только ASCII, nginx сам декодирует %XX в пути.
+        accel = (
+            settings.MEDIA_ACCEL_HEADER,
+            settings.MEDIA_ACCEL_REDIRECT + quote(path),
+        )
+    return serve_file(
+        request, fullpath, stat,
+        max_age=(
+            settings.MEDIA_IMMUTABLE_MAX_AGE if immutable
+            else settings.MEDIA_MAX_AGE
+        ),
+        immutable=immutable,
+        accel=accel,
+    )
+
+
+def static(request, path):
+    path, fullpath, stat = get_file(settings.STATIC_ROOT, path)
+    content_type, _ = mimetypes.guess_type(path)
+    is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+    immutable = is_hashed is not None and is_hashed(path)
+
+    accepted = accepted_encodings(request)
+    encoding = None
+    has_variants = False
+    for name, suffix in STATIC_ENCODINGS:
+        variant = fullpath.with_name(fullpath.name + suffix)
+        if not variant.is_file():
+            continue
+        has_variants = True
+        if encoding is None and name in accepted:
+            encoding, fullpath, stat = name, variant, variant.stat()
+
+    response = serve_file(
+        request, fullpath, stat,
+        max_age=(
+            settings.STATIC_IMMUTABLE_MAX_AGE if immutable
+            else settings.STATIC_MAX_AGE
+        ),
+        immutable=immutable,
+        content_type=content_type,
+        encoding=encoding,
+    )
+    if has_variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def metrics(request):
+    if client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    registry.flush(force=True)
+    return HttpResponse(
+        exposition(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@staff_member_required
+def profile_download(request, filename):
+    _, fullpath, _ = get_file(settings.PROFILE_DIR, filename)
+    return FileResponse(open(fullpath, 'rb'), as_attachment=True)
@@ -1,6 +1,21 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Follow, Post, Group
+from core.paginator import ApproximateCountPaginator
+
+from . import bulk_jobs
+from .models import BulkJob, Follow, GroupFollow, Post, Group
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+        empty_label='Без группы'
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,11 +27,122 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    paginator = ApproximateCountPaginator
+    # Иначе рядом с числом найденных считается еще и общий COUNT(*).
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = ('delete_in_background', 'move_to_group')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Удаление в запросе не укладывается в таймаут на больших выборках.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def submit_job(self, request, action, queryset, group=None):
+        job = bulk_jobs.submit(action, queryset, request.user, group)
+        self.message_user(request, format_html(
+            'Задание <a href="{}">№{}</a> поставлено в очередь: {} постов.',
+            reverse('admin:posts_bulkjob_change', args=(job.pk,)),
+            job.pk, job.total
+        ))
+
+    def confirm(self, request, queryset, template, **context):
+        """Страница подтверждения действия над выбранными постами."""
+        return render(request, template, {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'count': queryset.count(),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            **context,
+        })
+
+    def delete_in_background(self, request, queryset):
+        # Удаление необратимо, поэтому ставится только после подтверждения.
+        if 'apply' in request.POST:
+            self.submit_job(request, BulkJob.DELETE, queryset)
+            return None
+        return self.confirm(
+            request, queryset, 'admin/posts/post/delete_in_background.html'
+        )
+    delete_in_background.short_description = 'Удалить выбранные посты в фоне'
+    delete_in_background.allowed_permissions = ('delete',)
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'apply' in request.POST
+                               else None)
+        if form.is_valid():
+            self.submit_job(request, BulkJob.SET_GROUP, queryset,
+                            form.cleaned_data['group'])
+            return None
+        return self.confirm(
+            request, queryset, 'admin/posts/post/move_to_group.html',
+            form=form
+        )
+    move_to_group.short_description = 'Перенести выбранные посты в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        # В списке группы читаются один раз на страницу, а не отдельным
+        # запросом в каждой строке, как у виджета автодополнения.
+        field = formset.form.base_fields['group']
+        field.widget = forms.Select()
+        choices = list(field.choices)
+        field.iterator = lambda field: choices
+        return formset
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class BulkJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'action',
+        'group',
+        'status',
+        'progress',
+        'created_by',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'action')
+    exclude = ('post_ids', 'last_id')
+    readonly_fields = (
+        'action',
+        'group',
+        'status',
+        'progress',
+        'error',
+        'created_by',
+        'created',
+        'finished',
+        'heartbeat',
+    )
+
+    def progress(self, job):
+        percent = job.processed * 100 // job.total if job.total else 100
+        return f'{job.processed} из {job.total} ({percent}%)'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(BulkJob, BulkJobAdmin)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Follow)
+admin.site.register(GroupFollow)
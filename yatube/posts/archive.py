@@ -0,0 +1,70 @@
+"""Перенос старых постов в архивные таблицы.
+
+Почти все чтения приходятся на свежие посты, поэтому посты старше
+ARCHIVE_AFTER_DAYS вместе с комментариями переносятся в ArchivedPost и
+ArchivedComment с сохранением id. Таблица Post и ее индексы остаются
+небольшими, а страницы постов, профилей и групп дочитывают архив,
+когда свежих постов не хватает.
+"""
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from . import counts
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+
+def get_post(post_id):
+    """Пост по id: сначала среди свежих, затем в архиве."""
+    try:
+        return Post.objects.get(pk=post_id)
+    except Post.DoesNotExist:
+        return get_object_or_404(ArchivedPost, pk=post_id)
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит в архив до batch_size постов старше cutoff.
+
+    Каждая пачка - отдельная транзакция, чтобы не держать блокировку
+    на все время переноса. Возвращает число перенесенных постов.
+    """
+    with transaction.atomic():
+        posts = list(
+            Post.objects.filter(pub_date__lt=cutoff).order_by('pk')[
+                :batch_size
+            ]
+        )
+        if not posts:
+            return 0
+        post_ids = [post.pk for post in posts]
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.pk,
+                text=post.text,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=comment.pk,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                pub_date=comment.pub_date,
+            )
+            for comment in Comment.objects.filter(post_id__in=post_ids)
+        )
+        # Комментарии и оценки популярности удаляются каскадно, сигналы
+        # удаления сбрасывают счетчики свежих постов.
+        Post.objects.filter(pk__in=post_ids).delete()
+
+    keys = set()
+    for post in posts:
+        keys.add(counts.archive_key(counts.author_key(post.author_id)))
+        if post.group_id is not None:
+            keys.add(counts.archive_key(counts.group_key(post.group_id)))
+    counts.invalidate(*keys)
+    return len(posts)
@@ -0,0 +1,133 @@
+"""Массовые действия над постами в фоне.
+
+Действие из админки не выполняется в запросе, а создает BulkJob с
+отсортированным массивом выбранных id. Команда run_bulk_jobs идет по
+массиву пачками по возрастанию id, каждая пачка и отметка о прогрессе
+пишутся одной короткой транзакцией. После пачки исполнитель спит так,
+чтобы занимать БД не больше доли BULK_JOB_DUTY_CYCLE времени.
+
+Исполнитель захватывает задание условным UPDATE, поэтому несколько
+исполнителей не берут одно задание. Каждая запись прогресса проверяет
+heartbeat задания: если задание, не подававшее признаков жизни
+BULK_JOB_STALE_AFTER секунд, забрал другой исполнитель, прежний
+прерывается, не записав пачку.
+"""
+import datetime as dt
+import time
+from array import array
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counts, latest, windows
+from .models import BulkJob, Post
+
+
+class JobLost(Exception):
+    """Задание забрал другой исполнитель."""
+
+
+def save(job, **fields):
+    """Записывает поля задания, если его heartbeat не сменился."""
+    now = timezone.now()
+    updated = BulkJob.objects.filter(
+        pk=job.pk, heartbeat=job.heartbeat
+    ).update(heartbeat=now, **fields)
+    if not updated:
+        raise JobLost(job.pk)
+    job.heartbeat = now
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def submit(action, queryset, user=None, group=None):
+    ids = array('I', queryset.order_by('pk').values_list('pk', flat=True))
+    return BulkJob.objects.create(
+        action=action,
+        group=group,
+        post_ids=ids.tobytes(),
+        total=len(ids),
+        created_by=user,
+    )
+
+
+def load_ids(job):
+    ids = array('I')
+    ids.frombytes(bytes(job.post_ids))
+    return ids
+
+
+def apply_chunk(job, chunk):
+    posts = Post.objects.filter(pk__in=chunk)
+    if job.action == BulkJob.DELETE:
+        # delete() отправляет сигналы, они сбрасывают счетчики.
+        posts.delete()
+        return
+    # update() сигналы не отправляет, счетчики групп сбрасываем сами.
+    group_ids = set(posts.values_list('group_id', flat=True))
+    posts.update(group=job.group)
+    group_ids.add(job.group_id)
+    group_ids.discard(None)
+    group_keys = [counts.group_key(group_id) for group_id in group_ids]
+    counts.invalidate(counts.index_key(), *group_keys)
+    counts.invalidate_pages(*group_keys)
+    counts.invalidate(*(latest.group_key(group_id) for group_id in group_ids))
+    windows.invalidate(*group_ids)
+
+
+def run_chunk(job, ids, chunk_size):
+    """Обрабатывает следующую пачку, возвращает False, если пачек нет."""
+    start = bisect_right(ids, job.last_id)
+    chunk = ids[start:start + chunk_size]
+    if not chunk:
+        return False
+    with transaction.atomic():
+        apply_chunk(job, list(chunk))
+        save(job, processed=start + len(chunk), last_id=chunk[-1])
+    return True
+
+
+def run(job, chunk_size=None, duty_cycle=None):
+    """Выполняет задание до конца; прерванное продолжается с last_id."""
+    chunk_size = chunk_size or settings.BULK_JOB_CHUNK_SIZE
+    duty_cycle = duty_cycle or settings.BULK_JOB_DUTY_CYCLE
+    ids = load_ids(job)
+    save(job, status=BulkJob.RUNNING)
+    try:
+        while True:
+            started = time.monotonic()
+            if not run_chunk(job, ids, chunk_size):
+                break
+            elapsed = time.monotonic() - started
+            time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    except JobLost:
+        raise
+    except Exception as error:
+        save(job, status=BulkJob.FAILED, error=repr(error))
+        raise
+    save(job, status=BulkJob.DONE, finished=timezone.now())
+
+
+def next_job():
+    """Захватывает старейшее задание в очереди или брошенное.
+
+    Задание считается брошенным, если оно выполняется, но его heartbeat
+    старше BULK_JOB_STALE_AFTER. None, если захватывать нечего.
+    """
+    now = timezone.now()
+    stale = now - dt.timedelta(seconds=settings.BULK_JOB_STALE_AFTER)
+    candidates = BulkJob.objects.filter(
+        Q(status=BulkJob.PENDING)
+        | Q(status=BulkJob.RUNNING, heartbeat__lt=stale)
+        | Q(status=BulkJob.RUNNING, heartbeat__isnull=True)
+    ).order_by('created', 'pk').values_list('pk', 'status', 'heartbeat')
+    for pk, status, heartbeat in candidates:
+        claimed = BulkJob.objects.filter(
+            pk=pk, status=status, heartbeat=heartbeat
+        ).update(status=BulkJob.RUNNING, heartbeat=now)
+        if claimed:
+            return BulkJob.objects.get(pk=pk)
+    return None
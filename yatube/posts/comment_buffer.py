@@ -0,0 +1,180 @@
+"""Отложенная запись комментариев.
+
+В режиме COMMENT_WRITE_BEHIND проверенные комментарии не сохраняются
+в запросе, а попадают в очередь процесса. Фоновый поток забирает их
+пачками не чаще раза в COMMENT_FLUSH_INTERVAL секунд и пишет одним
+bulk_create в короткой транзакции - вместо отдельного INSERT и
+блокировки SQLite на каждый комментарий.
+
+Очередь и незаписанные комментарии (pending) живут в памяти процесса.
+Автор видит свой комментарий до записи, только если следующий запрос
+попал в тот же процесс; при нескольких процессах комментарий может
+не показаться на странице после редиректа, пока его не запишет поток
+(не дольше COMMENT_FLUSH_INTERVAL). Поэтому режим рассчитан на
+развертывание с одним процессом на несколько потоков.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import (IntegrityError, close_old_connections, connection,
+                       transaction)
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+comments = queue.Queue()
+pending = defaultdict(list)
+lock = threading.Lock()
+flusher = None
+
+
+def post_exists(post_id):
+    """Проверка поста через кэш, чтобы не ходить в БД на каждый комментарий."""
+    key = f'posts:exists:{post_id}'
+    exists = cache.get(key)
+    if exists is None:
+        exists = Post.objects.filter(pk=post_id).exists()
+        cache.set(key, exists, settings.COMMENT_POST_EXISTS_TIMEOUT)
+    return exists
+
+
+def enqueue(comment):
+    comment.pub_date = timezone.now()
+    with lock:
+        pending[comment.post_id].append(comment)
+    comments.put(comment)
+    if settings.COMMENT_FLUSHER_THREAD:
+        start_flusher()
+
+
+def pending_for(post_id, user):
+    """Еще не записанные комментарии пользователя к посту, новые первыми."""
+    with lock:
+        return [comment for comment in reversed(pending.get(post_id, ()))
+                if comment.author_id == user.pk]
+
+
+def start_flusher():
+    global flusher
+    with lock:
+        if flusher is not None and flusher.is_alive():
+            return
+        flusher = threading.Thread(
+            target=run, name='comment-flusher', daemon=True
+        )
+        flusher.start()
+
+
+def run():
+    while True:
+        batch = collect(block=True)
+        try:
+            write(batch)
+        finally:
+            # Поток живет долго: соединение закрывается по тем же
+            # правилам CONN_MAX_AGE, что и после запроса.
+            close_old_connections()
+
+
+def collect(block):
+    """Забирает из очереди пачку, ожидая добора не дольше интервала."""
+    try:
+        batch = [comments.get(block=block)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + settings.COMMENT_FLUSH_INTERVAL
+    while len(batch) < settings.COMMENT_FLUSH_BATCH:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(comments.get(timeout=timeout))
+        except queue.Empty:
+            break
+    return batch
+
+
+def fill_pks(written):
+    """Дочитывает id, которые bulk_create не вернул (SQLite).
+
+    pub_date у комментариев уникален с точностью до микросекунды,
+    поэтому строки сопоставляются по посту, автору и дате.
+    """
+    missing = [comment for comment in written if comment.pk is None]
+    if not missing:
+        return
+    ids = {
+        (post_id, author_id, pub_date): pk
+        for pk, post_id, author_id, pub_date in Comment.objects.filter(
+            pub_date__in={comment.pub_date for comment in missing}
+        ).values_list('pk', 'post_id', 'author_id', 'pub_date')
+    }
+    for comment in missing:
+        comment.pk = ids.get(
+            (comment.post_id, comment.author_id, comment.pub_date)
+        )
+
+
+def write(batch):
+    written = batch
+    try:
+        try:
+            with transaction.atomic():
+                Comment.objects.bulk_create(written)
+                fill_pks(written)
+        except IntegrityError:
+            # Пост мог быть удален, пока комментарий ждал в очереди.
+            existing = set(Post.objects.filter(
+                pk__in={comment.post_id for comment in batch}
+            ).values_list('pk', flat=True))
+            written = [comment for comment in batch
+                       if comment.post_id in existing]
+            with transaction.atomic():
+                Comment.objects.bulk_create(written)
+                fill_pks(written)
+        # bulk_create не отправляет post_save, а от него зависят
+        # счетчики популярности.
+        for comment in written:
+            if comment.pk is None:
+                logger.warning('Не найден id записанного комментария')
+                continue
+            post_save.send(
+                sender=Comment, instance=comment, created=True,
+                update_fields=None, raw=False, using=connection.alias
+            )
+    except Exception:
+        logger.exception('Не удалось записать %s комментариев', len(batch))
+    finally:
+        with lock:
+            for comment in batch:
+                post_pending = pending.get(comment.post_id)
+                if post_pending and comment in post_pending:
+                    post_pending.remove(comment)
+                if not post_pending:
+                    pending.pop(comment.post_id, None)
+        for _ in batch:
+            comments.task_done()
+
+
+def flush():
+    """Дописывает очередь: ждет поток или пишет сам, если потока нет."""
+    if flusher is not None and flusher.is_alive():
+        comments.join()
+        return
+    while True:
+        batch = collect(block=False)
+        if not batch:
+            return
+        write(batch)
+
+
+atexit.register(flush)
@@ -0,0 +1,88 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.paginator import CachedCountPaginator, ChainedSequence
+
+
+def index_key():
+    return 'posts:count:index'
+
+
+def group_key(group_id):
+    return f'posts:count:group:{group_id}'
+
+
+def author_key(author_id):
+    return f'posts:count:author:{author_id}'
+
+
+def archive_key(count_key):
+    """Ключ счетчика архивной части той же ленты."""
+    return f'{count_key}:archive'
+
+
+def page_key(count_key, number):
+    """Ключ id постов страницы number той же ленты, см. page_cache.py."""
+    return f'{count_key}:page:{number}'
+
+
+def with_archive(queryset, archived, count_key):
+    """Свежие посты, за которыми следуют архивные."""
+    return ChainedSequence(
+        [(queryset, count_key), (archived, archive_key(count_key))],
+        count_timeout=settings.POST_COUNT_TIMEOUT,
+    )
+
+
+def paginator(queryset, count_key):
+    return CachedCountPaginator(
+        queryset, settings.POSTS_PER_PAGE,
+        count_key=count_key,
+        count_timeout=settings.POST_COUNT_TIMEOUT,
+    )
+
+
+def pages_version_key(count_key):
+    """Ключ версии закэшированных страниц ленты, см. page_cache.py."""
+    return f'{count_key}:pages'
+
+
+def pages_version(count_key):
+    """Текущая версия страниц ленты; потерянная версия заменяется новой."""
+    key = pages_version_key(count_key)
+    cache.add(key, uuid.uuid4().hex, settings.POST_COUNT_TIMEOUT)
+    return cache.get(key)
+
+
+def invalidate(*keys):
+    """Сбрасывает счетчики сразу и еще раз после коммита.
+
+    Запрос, посчитавший COUNT до коммита, закэшировал бы старое число на
+    POST_COUNT_TIMEOUT, поэтому ключи удаляются повторно, когда
+    изменение уже видно.
+    """
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_pages(*count_keys):
+    """Сбрасывает закэшированные страницы лент с этими счетчиками.
+
+    Новая версия отвергает и страницы, прочитанные из БД до сброса, но
+    записанные в кэш после него. Как и счетчики, страницы сбрасываются
+    еще раз после коммита.
+    """
+    def reset():
+        cache.set_many(
+            {pages_version_key(key): uuid.uuid4().hex for key in count_keys},
+            settings.POST_COUNT_TIMEOUT,
+        )
+        cache.delete_many([
+            page_key(key, number) for key in count_keys
+            for number in range(1, settings.PAGE_CACHE_PAGES + 1)
+        ])
+    reset()
+    transaction.on_commit(reset)
@@ -0,0 +1,38 @@
+"""Курсоры для подгрузки лент порциями.
+
+Курсор - непрозрачная строка с (pub_date, id) последнего показанного
+поста. Следующая порция выбирается условием по тем же полям, что и
+сортировка ('-pub_date', '-id'), и читается по индексу
+post_pub_date_idx без OFFSET, поэтому глубина прокрутки не влияет на
+стоимость запроса.
+"""
+import base64
+import binascii
+import datetime as dt
+
+from django.db.models import Q
+
+
+def encode(post):
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode(cursor):
+    """(pub_date, id) из курсора; ValueError, если курсор испорчен."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        pub_date, pk = raw.decode().split('|')
+        return dt.datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError(f'Неверный курсор: {cursor}') from error
+
+
+def after(queryset, position):
+    """Посты, идущие в ленте после position."""
+    if position is None:
+        return queryset
+    pub_date, pk = position
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+    )
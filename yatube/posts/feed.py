@@ -0,0 +1,139 @@
+"""Ленты из нескольких источников.
+
+Источник - queryset постов одного автора или одной группы, отсортированный
+по ('-pub_date', '-id'). Он читается пачками с условием по ключу (см.
+cursors.after) по индексам post_author_pub_date_idx и
+post_group_pub_date_idx, а лента собирается слиянием источников через
+heapq.merge. В памяти держится по одной пачке от источника, следующая
+пачка запрашивается, только когда предыдущая исчерпана. Так вместо
+одного запроса с OR по всем подпискам выполняется несколько коротких
+запросов по индексам.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import counts, cursors
+from .models import Post
+
+
+def sort_key(post):
+    return post.pub_date, post.pk
+
+
+def stream(queryset, position=None, batch_size=None):
+    """Посты queryset после position, прочитанные пачками по ключу."""
+    batch_size = batch_size or settings.FEED_BATCH_SIZE
+    while True:
+        batch = list(cursors.after(queryset, position)[:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        position = sort_key(batch[-1])
+
+
+def merge(streams):
+    """Посты всех streams по убыванию (pub_date, id) без повторов."""
+    last = None
+    for post in heapq.merge(*streams, key=sort_key, reverse=True):
+        # Один пост из разных источников приходит подряд.
+        if post.pk != last:
+            last = post.pk
+            yield post
+
+
+def chunks(ids, parts):
+    """ids, разбитые не больше чем на parts частей подряд."""
+    size = -(-len(ids) // parts)
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
+
+class Feed:
+    """Слияние источников как последовательность для Paginator.
+
+    querysets - источники, counter - функция, возвращающая размер ленты.
+    Срез [start:stop] читает из каждого источника не больше stop постов,
+    поэтому первые страницы дешевы, а глубокие обходятся дороже. Для
+    Paginator лента обрезана до FEED_MAX_PAGES страниц; дальше ее читают
+    через after() фрагментами с курсором.
+    """
+
+    def __init__(self, querysets, counter):
+        self.querysets = querysets
+        self.counter = counter
+
+    def count(self):
+        return min(self.counter(),
+                   settings.FEED_MAX_PAGES * settings.POSTS_PER_PAGE)
+
+    def __len__(self):
+        return self.count()
+
+    def posts(self, position=None, batch_size=None):
+        return merge(
+            stream(queryset, position, batch_size)
+            for queryset in self.querysets
+        )
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Feed поддерживает только срезы')
+        start, stop = index.start or 0, index.stop
+        batch_size = settings.FEED_BATCH_SIZE
+        if stop is not None:
+            batch_size = max(min(batch_size, stop), 1)
+        return list(islice(self.posts(batch_size=batch_size), start, stop))
+
+    def after(self, position, limit):
+        """До limit постов ленты после position."""
+        batch_size = max(min(settings.FEED_BATCH_SIZE, limit), 1)
+        return list(islice(self.posts(position, batch_size), limit))
+
+
+def cached_counts(field, ids, key):
+    """Сумма закэшированных счетчиков постов по значениям field.
+
+    Недостающие в кэше счетчики считаются одним GROUP BY.
+    """
+    keys = {key(value): value for value in ids}
+    cached = cache.get_many(keys)
+    missing = [value for cache_key, value in keys.items()
+               if cache_key not in cached]
+    if missing:
+        found = dict(
+            Post.objects.filter(**{f'{field}__in': missing})
+            .values_list(field).annotate(count=Count('pk'))
+            .order_by()
+        )
+        fresh = {key(value): found.get(value, 0) for value in missing}
+        cache.set_many(fresh, settings.POST_COUNT_TIMEOUT)
+        cached.update(fresh)
+    return sum(cached.values())
+
+
+def build(field, ids, key):
+    """Лента постов, у которых field входит в ids.
+
+    Каждое значение - отдельный источник; если значений больше
+    FEED_MAX_STREAMS, соседние объединяются, чтобы страница стоила
+    не больше FEED_MAX_STREAMS запросов.
+    """
+    ids = list(ids)
+    querysets = [
+        Post.objects.filter(**{f'{field}__in': part}).select_related(
+            'author', 'group'
+        )
+        for part in (chunks(ids, settings.FEED_MAX_STREAMS) if ids else ())
+    ]
+    return Feed(querysets, lambda: cached_counts(field, ids, key))
+
+
+def following(author_ids):
+    return build('author_id', author_ids, counts.author_key)
+
+
+def groups(group_ids):
+    return build('group_id', group_ids, counts.group_key)
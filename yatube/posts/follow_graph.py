@@ -0,0 +1,96 @@
+"""Граф подписок в кэше.
+
+Подписки пользователя хранятся отсортированным массивом id авторов
+(array('I'), 4 байта на подписку), число подписчиков автора - целым.
+Формат записей версионирован через FOLLOW_GRAPH_VERSION: при его смене
+старые записи просто перестают читаться. Изменение подписки сбрасывает
+записи пользователя и автора, и они перечитываются из БД при следующем
+обращении.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+
+def following_key(user_id):
+    return f'follow_graph:following:{user_id}'
+
+
+def followers_key(author_id):
+    return f'follow_graph:followers:{author_id}'
+
+
+def _get(key):
+    return cache.get(key, version=settings.FOLLOW_GRAPH_VERSION)
+
+
+def _set(key, value):
+    cache.set(key, value, settings.FOLLOW_GRAPH_TIMEOUT,
+              version=settings.FOLLOW_GRAPH_VERSION)
+
+
+def _load(data):
+    ids = array('I')
+    ids.frombytes(data)
+    return ids
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    data = _get(following_key(user_id))
+    if data is not None:
+        return _load(data)
+    ids = array('I', Follow.objects.filter(user_id=user_id).order_by(
+        'author_id').values_list('author_id', flat=True))
+    _set(following_key(user_id), ids.tobytes())
+    return ids
+
+
+def _contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def is_following(user_id, author_id):
+    if user_id is None:
+        return False
+    return _contains(following_ids(user_id), author_id)
+
+
+def following_among(user_id, author_ids):
+    """Те из author_ids, на которых подписан user_id, одним чтением кэша."""
+    if user_id is None:
+        return set()
+    ids = following_ids(user_id)
+    return {author_id for author_id in author_ids
+            if _contains(ids, author_id)}
+
+
+def follower_count(author_id):
+    count = _get(followers_key(author_id))
+    if count is None:
+        count = Follow.objects.filter(author_id=author_id).count()
+        _set(followers_key(author_id), count)
+    return count
+
+
+def changed(user_id, author_id):
+    """Сбрасывает записи графа сразу и еще раз после коммита.
+
+    Записи не правятся на месте: правка чтением и записью массива
+    теряла бы одновременные подписки. Повторный сброс после коммита
+    убирает записи, которые другие процессы успели перечитать из БД
+    до коммита.
+    """
+    def reset():
+        cache.delete_many(
+            [following_key(user_id), followers_key(author_id)],
+            version=settings.FOLLOW_GRAPH_VERSION,
+        )
+    reset()
+    transaction.on_commit(reset)
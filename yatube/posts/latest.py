@@ -0,0 +1,109 @@
+"""id последнего поста в каждой ленте, закэшированный.
+
+Новый пост сбрасывает ключи индекса, группы и автора (см. signals.py),
+следующий опрос пересчитывает их одним Max, а остальные ответы «новых
+постов нет» строятся без SQL. Лента подписок собирается из ключей
+авторов одним get_many.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Group, Post
+
+
+def index_key():
+    return 'posts:latest:index'
+
+
+def group_key(group_id):
+    return f'posts:latest:group:{group_id}'
+
+
+def author_key(author_id):
+    return f'posts:latest:author:{author_id}'
+
+
+def slug_key(slug):
+    """Ключ по хэшу slug: сырой текст из URL мог бы не подойти memcached."""
+    return 'posts:group_id:' + hashlib.sha1(slug.encode()).hexdigest()
+
+
+def _latest(key, queryset):
+    latest = cache.get(key)
+    if latest is None:
+        latest = queryset.aggregate(latest=Max('pk'))['latest'] or 0
+        cache.set(key, latest, settings.LATEST_POST_TIMEOUT)
+    return latest
+
+
+def index_latest():
+    return _latest(index_key(), Post.objects.all())
+
+
+def group_latest(group_id):
+    return _latest(group_key(group_id), Post.objects.filter(group_id=group_id))
+
+
+def authors_latest(author_ids):
+    """Наибольший id поста среди авторов author_ids."""
+    keys = {author_key(author_id): author_id for author_id in author_ids}
+    found = cache.get_many(keys)
+    missing = [author_id for key, author_id in keys.items()
+               if key not in found]
+    if missing:
+        latest = dict(
+            Post.objects.filter(author_id__in=missing).values_list(
+                'author_id'
+            ).annotate(Max('pk')).order_by()
+        )
+        values = {author_key(author_id): latest.get(author_id, 0)
+                  for author_id in missing}
+        cache.set_many(values, settings.LATEST_POST_TIMEOUT)
+        found.update(values)
+    return max(found.values(), default=0)
+
+
+def group_id(slug):
+    """id группы по slug через кэш, None для несуществующей группы."""
+    value = cache.get(slug_key(slug))
+    if value is None:
+        value = Group.objects.filter(slug=slug).values_list(
+            'pk', flat=True
+        ).first() or 0
+        cache.set(slug_key(slug), value, settings.LATEST_POST_TIMEOUT)
+    return value or None
+
+
+def _reset(keys):
+    """Удаляет ключи сразу и еще раз после коммита.
+
+    Запрос, успевший до коммита пересчитать ключ из БД, закэширует
+    старый id, поэтому ключи сбрасываются повторно, когда пост виден.
+    Ключи не правятся на месте: чтение и запись не атомарны, и
+    одновременные посты могли бы записать меньший id последним.
+    """
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def post_created(post):
+    keys = [index_key(), author_key(post.author_id)]
+    if post.group_id is not None:
+        keys.append(group_key(post.group_id))
+    _reset(keys)
+
+
+def post_changed(post, *group_ids):
+    """Сбрасывает ключи лент, где последним мог быть этот пост."""
+    keys = [index_key(), author_key(post.author_id)]
+    keys.extend(group_key(group_id) for group_id in group_ids
+                if group_id is not None)
+    _reset(keys)
+
+
+def forget_slug(slug):
+    cache.delete(slug_key(slug))
@@ -0,0 +1,49 @@
+"""События о новых постах и комментариях для потоков SSE."""
+from django.db import transaction
+from django.urls import reverse
+
+from core.pubsub import get_broker
+
+
+def group_channel(group_id):
+    return f'group:{group_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def comments_channel(post_id):
+    return f'post:{post_id}:comments'
+
+
+def publish_post(post):
+    payload = {
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group_id,
+        'text': post.text[:200],
+        'url': reverse('posts:post_detail', args=(post.pk,)),
+    }
+    channels = [author_channel(post.author_id)]
+    if post.group_id is not None:
+        channels.append(group_channel(post.group_id))
+
+    def send():
+        broker = get_broker()
+        for channel in channels:
+            broker.publish(channel, 'post', payload)
+    # Подписчик не должен узнать о посте раньше, чем тот станет виден.
+    transaction.on_commit(send)
+
+
+def publish_comment(comment):
+    payload = {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+    }
+    transaction.on_commit(lambda: get_broker().publish(
+        comments_channel(comment.post_id), 'comment', payload
+    ))
@@ -0,0 +1,68 @@
+import pickle
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.page_cache import hydrate, pack, unpack
+
+
+def measure(function, repeat):
+    """Среднее время вызова function в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def peak_memory(function):
+    """Пик выделенной памяти при вызове function в байтах."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер и скорость кэша страницы списком id '
+            'с pickle объектов Post')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=settings.POSTS_PER_PAGE,
+            help='Сколько последних постов положить на страницу'
+        )
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        posts = list(
+            Post.objects.select_related('author', 'group')[:options['posts']]
+        )
+        if not posts:
+            self.stdout.write('Нет постов для замера')
+            return
+        repeat = options['repeat']
+        pickled = pickle.dumps(posts, pickle.HIGHEST_PROTOCOL)
+        packed = pack(posts)
+        methods = (
+            ('pickle Post', pickled,
+             lambda: pickle.dumps(posts, pickle.HIGHEST_PROTOCOL),
+             lambda: pickle.loads(pickled)),
+            ('array id + in_bulk', packed,
+             lambda: pack(posts),
+             lambda: hydrate(unpack(packed))),
+        )
+        self.stdout.write(f'Постов на странице: {len(posts)}')
+        self.stdout.write(
+            f'{"способ":<20} {"в кэше, байт":>13} {"запись, мс":>11} '
+            f'{"чтение, мс":>11} {"пик чтения, байт":>17}'
+        )
+        for name, data, dump, load in methods:
+            self.stdout.write(
+                f'{name:<20} {len(data):>13} {measure(dump, repeat):>11.3f} '
+                f'{measure(load, repeat):>11.3f} {peak_memory(load):>17}'
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import catch_up
+
+
+class Command(BaseCommand):
+    help = 'Учитывает в оценках популярных постов все новые комментарии'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено оценок: {catch_up()}'
+        ))
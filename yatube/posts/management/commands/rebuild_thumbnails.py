@@ -0,0 +1,264 @@
+import json
+import os
+import time
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize, serialize
+from sorl.thumbnail.images import ImageFile, serialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+from sorl.thumbnail.parsers import parse_geometry
+
+from posts.models import Post
+
+
+DEFAULT_GEOMETRY = '960x339'
+DEFAULT_OPTIONS = {'crop': 'center', 'upscale': True}
+CACHED_DB_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+
+
+def thumbnail_options(backend, source, options):
+    """Дополняет опции так же, как это делает ThumbnailBackend."""
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def build_source(name, geometries, options, force):
+    """Строит миниатюры одного исходника.
+
+    Возвращает сырые записи KV-хранилища: исходник, миниатюры
+    и ключи миниатюр, которые нужно добавить в список исходника.
+    """
+    backend = default.backend
+    engine = default.engine
+    storage = Post._meta.get_field('image').storage
+    source = ImageFile(name, storage)
+    image = engine.get_image(source)
+    source.set_size(engine.get_image_size(image))
+    rows = {add_prefix(source.key): serialize_image_file(source)}
+    thumbnail_keys = []
+
+    plan = []
+    for geometry_string in geometries:
+        thumb_options = thumbnail_options(backend, source, options)
+        thumbnail = ImageFile(
+            backend._get_thumbnail_filename(
+                source, geometry_string, thumb_options
+            ),
+            default.storage
+        )
+        ratio = engine.get_image_ratio(image, thumb_options)
+        plan.append((thumbnail, parse_geometry(geometry_string, ratio),
+                     thumb_options))
+
+    # Декодируем JPEG сразу в уменьшенном масштабе: draft выбирает
+    # наименьший масштаб DCT, при котором картинка не меньше миниатюры.
+    scale = max(thumbnail_settings.THUMBNAIL_ALTERNATIVE_RESOLUTIONS or [1])
+    sizes = [geometry for _, geometry, thumb_options in plan
+             if not thumb_options.get('cropbox')]
+    if (
+        len(sizes) == len(plan)
+        and all(None not in size for size in sizes)
+        and getattr(image, 'format', None) == 'JPEG'
+    ):
+        image.draft('RGB', (
+            int(max(width for width, _ in sizes) * scale),
+            int(max(height for _, height in sizes) * scale),
+        ))
+
+    try:
+        for thumbnail, geometry, thumb_options in plan:
+            if force or not thumbnail.exists():
+                thumb_options['image_info'] = engine.get_image_info(image)
+                thumb_image = engine.create(image, geometry, thumb_options)
+                engine.write(thumb_image, thumb_options, thumbnail)
+                thumbnail.set_size(engine.get_image_size(thumb_image))
+            else:
+                thumbnail.set_size()
+            rows[add_prefix(thumbnail.key)] = serialize_image_file(thumbnail)
+            thumbnail_keys.append(thumbnail.key)
+    finally:
+        engine.cleanup(image)
+    return rows, {add_prefix(source.key, 'thumbnails'): thumbnail_keys}
+
+
+def build_chunk(names, geometries, options, force):
+    """Обрабатывает пачку исходников в процессе пула."""
+    rows, thumbnails, errors = {}, {}, []
+    for name in names:
+        try:
+            source_rows, source_thumbnails = build_source(
+                name, geometries, options, force
+            )
+        except Exception as error:
+            errors.append((name, str(error)))
+            continue
+        rows.update(source_rows)
+        thumbnails.update(source_thumbnails)
+    return rows, thumbnails, errors
+
+
+def store_chunk(rows, thumbnails):
+    """Записывает пачку записей KV-хранилища одной транзакцией."""
+    existing = dict(
+        KVStore.objects.filter(key__in=thumbnails).values_list('key', 'value')
+    )
+    for key, keys in thumbnails.items():
+        if key in existing:
+            keys = set(keys) | set(deserialize(existing[key]))
+        rows[key] = serialize(sorted(keys))
+
+    if thumbnail_settings.THUMBNAIL_KVSTORE != CACHED_DB_KVSTORE:
+        for key, value in rows.items():
+            default.kvstore._set_raw(key, value)
+        return
+
+    with transaction.atomic():
+        KVStore.objects.filter(key__in=rows).delete()
+        KVStore.objects.bulk_create(
+            KVStore(key=key, value=value) for key, value in rows.items()
+        )
+    default.kvstore.cache.set_many(
+        rows, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересоздает миниатюры картинок всех постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-g', '--geometry', action='append', dest='geometries',
+            help='Размер миниатюры, можно указать несколько раз '
+                 f'(по умолчанию {DEFAULT_GEOMETRY})'
+        )
+        parser.add_argument('--crop', default=DEFAULT_OPTIONS['crop'])
+        parser.add_argument(
+            '--no-upscale', action='store_false', dest='upscale'
+        )
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов, 1 - без пула'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздавать уже существующие файлы миниатюр'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с поста, на котором остановился прошлый запуск'
+        )
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(settings.MEDIA_ROOT, '.rebuild_thumbnails'),
+        )
+
+    def handle(self, *args, **options):
+        geometries = options['geometries'] or [DEFAULT_GEOMETRY]
+        thumb_options = {
+            'crop': options['crop'], 'upscale': options['upscale']
+        }
+        chunk_size = options['chunk_size']
+        if chunk_size < 1 or options['workers'] < 1:
+            raise CommandError('chunk-size и workers должны быть больше 0')
+
+        state_file = options['state_file']
+        last_pk = 0
+        if options['resume'] and os.path.exists(state_file):
+            with open(state_file) as file:
+                state = json.load(file)
+            if state['geometries'] != geometries:
+                raise CommandError(
+                    'Прошлый запуск был с другими размерами: '
+                    f'{", ".join(state["geometries"])}'
+                )
+            last_pk = state['last_pk']
+
+        posts = Post.objects.exclude(image='').order_by('pk')
+        total = posts.filter(pk__gt=last_pk).count()
+        self.stdout.write(
+            f'Миниатюр к пересозданию: {total} x {len(geometries)}'
+        )
+
+        pool = None
+        if options['workers'] > 1:
+            pool = get_context('spawn').Pool(
+                options['workers'], initializer=django.setup
+            )
+        done = failed = 0
+        started = time.monotonic()
+        try:
+            for chunk in self.chunks(posts, last_pk, chunk_size):
+                names = [name for _, name in chunk]
+                rows, thumbnails, errors = self.build(
+                    pool, names, geometries, thumb_options, options
+                )
+                store_chunk(rows, thumbnails)
+                for name, error in errors:
+                    self.stderr.write(f'{name}: {error}')
+
+                last_pk = chunk[-1][0]
+                with open(state_file, 'w') as file:
+                    json.dump(
+                        {'geometries': geometries, 'last_pk': last_pk}, file
+                    )
+                done += len(chunk)
+                failed += len(errors)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{done}/{total} ({done / elapsed:.1f} изобр./с), '
+                    f'ошибок: {failed}, последний id: {last_pk}'
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        self.stdout.write(self.style.SUCCESS(f'Готово: {done}'))
+
+    def chunks(self, posts, last_pk, chunk_size):
+        while True:
+            chunk = list(
+                posts.filter(pk__gt=last_pk)
+                .values_list('pk', 'image')[:chunk_size]
+            )
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1][0]
+
+    def build(self, pool, names, geometries, thumb_options, options):
+        if pool is None:
+            return build_chunk(
+                names, geometries, thumb_options, options['force']
+            )
+        workers = options['workers']
+        step = max(1, -(-len(names) // workers))
+        results = pool.starmap(build_chunk, [
+            (names[i:i + step], geometries, thumb_options, options['force'])
+            for i in range(0, len(names), step)
+        ])
+        rows, thumbnails, errors = {}, {}, []
+        for chunk_rows, chunk_thumbnails, chunk_errors in results:
+            rows.update(chunk_rows)
+            thumbnails.update(chunk_thumbnails)
+            errors.extend(chunk_errors)
+        return rows, thumbnails, errors
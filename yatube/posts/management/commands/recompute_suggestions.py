@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import recompute
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для изменившихся подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true', dest='recompute_all',
+            help='Пересчитать всех пользователей, а не только изменившихся'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = recompute(
+            top_k=options['top_k'],
+            batch_size=options['batch_size'],
+            recompute_all=options['recompute_all'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано пользователей: {count} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
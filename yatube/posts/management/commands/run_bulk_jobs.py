@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import bulk_jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет массовые действия над постами, поставленные в админке'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.BULK_JOB_CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--duty-cycle', type=float, default=settings.BULK_JOB_DUTY_CYCLE,
+            help='Доля времени, которую исполнитель занимает БД'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новых заданий'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            job = bulk_jobs.next_job()
+            if job is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            try:
+                bulk_jobs.run(
+                    job, options['chunk_size'], options['duty_cycle']
+                )
+            except Exception as error:
+                self.stderr.write(f'Задание {job.pk} прервано: {error!r}')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Задание {job.pk}: обработано {job.processed}'
+                ))
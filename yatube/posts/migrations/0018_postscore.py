@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_auto_20261019_0808'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(db_index=True, verbose_name='Оценка')),
+            ],
+            options={
+                'ordering': ('-score',),
+            },
+        ),
+    ]
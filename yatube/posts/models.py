@@ -45,6 +45,14 @@ class Post(CreatModel):
 
     class Meta:
         ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('pub_date', 'id'), name='post_pub_date_idx'),
+            # Источники лент подписок, см. posts/feed.py.
+            models.Index(fields=('author', 'pub_date', 'id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', 'pub_date', 'id'),
+                         name='post_group_pub_date_idx'),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -78,6 +86,67 @@ class Comment(CreatModel):
         return self.text
 
 
+class ArchivedPost(models.Model):
+    """Старый пост, перенесенный из Post командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому старые ссылки работают.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст комментария')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+
+    def __str__(self):
+        return self.text
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -99,3 +168,151 @@ class Follow(models.Model):
                 name='unique_user'
             ),
         )
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        related_name='group_follows',
+        on_delete=models.CASCADE
+    )
+    group = models.ForeignKey(
+        Group,
+        verbose_name='Группа',
+        related_name='followers',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'group',),
+                name='unique_group_follow'
+            ),
+        )
+
+
+class Suggestion(models.Model):
+    """Рекомендация автора, посчитанная по совместным подпискам."""
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        related_name='suggestions',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author',),
+                name='unique_suggestion'
+            ),
+        )
+
+
+class SuggestionState(models.Model):
+    """Отпечаток подписок, по которым последний раз считались рекомендации."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    fingerprint = models.CharField(max_length=40)
+
+
+class PostScore(models.Model):
+    """Сохраненная оценка популярности поста.
+
+    score - логарифм суммы 2 ** ((t - эпоха) / период полураспада) по всем
+    комментариям: такие оценки можно сравнивать без пересчета во времени.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='trending_score',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField('Оценка', db_index=True)
+
+    class Meta:
+        ordering = ('-score',)
+
+
+class TrendingState(models.Model):
+    """id последнего комментария, уже учтенного в PostScore."""
+    last_comment_id = models.PositiveIntegerField(default=0)
+
+
+class BulkJob(models.Model):
+    """Массовое действие над постами, выполняемое командой run_bulk_jobs.
+
+    Выбранные id хранятся отсортированным массивом array('I') и
+    обрабатываются по возрастанию id пачками, last_id - последний
+    обработанный id. heartbeat обновляется каждой пачкой: по нему
+    исполнитель отличает свое задание и находит брошенные.
+    """
+    DELETE = 'delete'
+    SET_GROUP = 'set_group'
+    ACTIONS = (
+        (DELETE, 'Удалить посты'),
+        (SET_GROUP, 'Перенести посты в группу'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=20, choices=ACTIONS)
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    post_ids = models.BinaryField('id постов')
+    total = models.PositiveIntegerField('Всего')
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    last_id = models.PositiveIntegerField(default=0)
+    status = models.CharField(
+        'Статус', max_length=20, choices=STATUSES, default=PENDING,
+        db_index=True
+    )
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        'Последняя активность', null=True, blank=True
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Массовое действие'
+        verbose_name_plural = 'Массовые действия'
+
+    def __str__(self):
+        return f'{self.get_action_display()} ({self.total})'
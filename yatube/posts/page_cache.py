@@ -0,0 +1,80 @@
+"""Компактный кэш страниц лент.
+
+В кэше лежат не HTML и не pickle объектов Post со связанными автором и
+группой, а только id постов страницы в array('I') - 4 байта на пост.
+При чтении посты поднимаются одним in_bulk с select_related, поэтому
+правка текста сразу видна, а сбрасывать страницу нужно, только когда
+меняется состав ленты. Это делает counts.invalidate_pages из тех же
+сигналов, что сбрасывают счетчики лент. Страница хранится вместе с
+версией страниц ленты, взятой до чтения из БД, поэтому сброс во время
+чтения не оставит в кэше устаревшую страницу. Сравнение с pickle:
+manage.py bench_page_cache.
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counts
+from .models import Post
+
+
+def pack(posts):
+    return array('I', (post.pk for post in posts)).tobytes()
+
+
+def unpack(data):
+    ids = array('I')
+    ids.frombytes(data)
+    return ids
+
+
+def hydrate(post_ids):
+    """Посты по id в том же порядке; удаленные пропускаются."""
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        list(post_ids)
+    )
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+class CachedPages:
+    """Последовательность для Paginator с кэшем первых страниц.
+
+    Срезы первых PAGE_CACHE_PAGES страниц запоминаются как id постов
+    под ключами, производными от count_key; остальные срезы и страницы
+    с архивными постами читаются из sequence как есть.
+    """
+
+    def __init__(self, sequence, count_key):
+        self.sequence = sequence
+        self.count_key = count_key
+
+    def count(self):
+        if hasattr(self.sequence, 'count'):
+            return self.sequence.count()
+        return len(self.sequence)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('CachedPages поддерживает только срезы')
+        start = index.start or 0
+        per_page = settings.POSTS_PER_PAGE
+        number = start // per_page + 1
+        if start % per_page or number > settings.PAGE_CACHE_PAGES:
+            return self.sequence[index]
+        key = counts.page_key(self.count_key, number)
+        version_key = counts.pages_version_key(self.count_key)
+        cached = cache.get_many([key, version_key])
+        version = cached.get(version_key)
+        if key in cached and cached[key][0] == version:
+            return hydrate(unpack(cached[key][1]))
+        if version is None:
+            version = counts.pages_version(self.count_key)
+        posts = list(self.sequence[index])
+        if all(type(post) is Post for post in posts):
+            cache.set(key, (version, pack(posts)),
+                      settings.POST_COUNT_TIMEOUT)
+        return posts
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counts, follow_graph, latest, live, trending, windows
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # При редактировании пост может сменить группу,
+    # тогда счетчик нужно сбросить и у старой группы.
+    instance._old_group_id = None
+    if instance.pk is not None:
+        instance._old_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_counts(sender, instance, **kwargs):
+    keys = [counts.index_key(), counts.author_key(instance.author_id)]
+    for group_id in {instance.group_id, getattr(instance, '_old_group_id',
+                                                None)}:
+        if group_id is not None:
+            keys.append(counts.group_key(group_id))
+    counts.invalidate(*keys)
+    # Индекс закрыт cache_page, его страницы по id не кэшируются.
+    counts.invalidate_pages(*keys[1:])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def forget_trending(sender, instance, **kwargs):
+    trending.forget(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created and instance.post_id is not None:
+        trending.record_comment()
+        live.publish_comment(instance)
+
+
+@receiver(post_save, sender=Post)
+def remember_latest(sender, instance, created, **kwargs):
+    if created:
+        latest.post_created(instance)
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        latest.post_changed(instance, old_group_id, instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+def update_window(sender, instance, created, **kwargs):
+    windows.post_saved(
+        instance, created, getattr(instance, '_old_group_id', None)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def forget_window(sender, instance, **kwargs):
+    windows.post_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, **kwargs):
+    if created:
+        live.publish_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def forget_latest(sender, instance, **kwargs):
+    latest.post_changed(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group_slug(sender, instance, **kwargs):
+    latest.forget_slug(instance.slug)
@@ -0,0 +1,135 @@
+"""Рекомендации авторов по совместным подпискам.
+
+Таблица Follow загружается в разреженную матрицу пользователь x автор
+в формате CSR (indptr/indices на массивах array) и ее транспонированную
+копию автор x пользователь. Для пользователя u похожесть на v - косинус
+между их наборами подписок, оценка автора a - сумма похожестей тех v,
+кто подписан на a.
+"""
+import hashlib
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Follow, Suggestion, SuggestionState
+
+
+class SparseMatrix:
+    """Разреженная 0/1 матрица в формате CSR."""
+
+    def __init__(self, pairs):
+        """pairs - отсортированные по строке пары (строка, столбец)."""
+        self.rows = {}
+        self.indptr = array('I', [0])
+        self.indices = array('I')
+        current = None
+        for row, column in pairs:
+            if row != current:
+                if current is not None:
+                    self.indptr.append(len(self.indices))
+                self.rows[row] = len(self.rows)
+                current = row
+            self.indices.append(column)
+        if current is not None:
+            self.indptr.append(len(self.indices))
+
+    def row(self, row):
+        index = self.rows.get(row)
+        if index is None:
+            return self.indices[0:0]
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def transpose(self):
+        pairs = sorted(
+            (column, row)
+            for row, index in self.rows.items()
+            for column in self.indices[
+                self.indptr[index]:self.indptr[index + 1]
+            ]
+        )
+        return SparseMatrix(pairs)
+
+
+def load_follow_matrix():
+    pairs = Follow.objects.order_by('user_id', 'author_id').values_list(
+        'user_id', 'author_id'
+    ).iterator()
+    return SparseMatrix(pairs)
+
+
+def fingerprint(author_ids):
+    return hashlib.sha1(author_ids.tobytes()).hexdigest()
+
+
+def score_user(user_id, follows, followers, top_k):
+    following = follows.row(user_id)
+    if not following:
+        return []
+    own = set(following)
+    overlap = defaultdict(int)
+    for author_id in following:
+        for other_id in followers.row(author_id):
+            if other_id != user_id:
+                overlap[other_id] += 1
+
+    scores = defaultdict(float)
+    for other_id, common in overlap.items():
+        other_following = follows.row(other_id)
+        weight = common / math.sqrt(len(following) * len(other_following))
+        for author_id in other_following:
+            if author_id not in own and author_id != user_id:
+                scores[author_id] += weight
+    return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def changed_users(follows, recompute_all=False):
+    """Пользователи, чьи подписки изменились с прошлого пересчета."""
+    states = dict(SuggestionState.objects.values_list('user_id',
+                                                      'fingerprint'))
+    changed = {
+        user_id: fingerprint(follows.row(user_id))
+        for user_id in follows.rows
+    }
+    if not recompute_all:
+        changed = {
+            user_id: value for user_id, value in changed.items()
+            if states.get(user_id) != value
+        }
+    # Пользователи, которые отписались от всех, теряют рекомендации.
+    gone = [user_id for user_id in states if user_id not in follows.rows]
+    return changed, gone
+
+
+def recompute(top_k=10, batch_size=500, recompute_all=False):
+    """Пересчитывает рекомендации пачками, возвращает число пользователей."""
+    follows = load_follow_matrix()
+    followers = follows.transpose()
+    changed, gone = changed_users(follows, recompute_all)
+
+    if gone:
+        with transaction.atomic():
+            Suggestion.objects.filter(user_id__in=gone).delete()
+            SuggestionState.objects.filter(user_id__in=gone).delete()
+
+    user_ids = sorted(changed)
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        suggestions = [
+            Suggestion(user_id=user_id, author_id=author_id, score=score)
+            for user_id in batch
+            for author_id, score in score_user(
+                user_id, follows, followers, top_k
+            )
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(user_id__in=batch).delete()
+            Suggestion.objects.bulk_create(suggestions)
+            SuggestionState.objects.filter(user_id__in=batch).delete()
+            SuggestionState.objects.bulk_create(
+                SuggestionState(user_id=user_id, fingerprint=changed[user_id])
+                for user_id in batch
+            )
+    return len(user_ids)
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def changelist_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов списка постов не зависит от числа постов"""
+        Post.objects.create(author=self.admin, group=self.group, text='Пост')
+        before = self.changelist_queries()
+        for n in range(20):
+            author = User.objects.create_user(username=f'author{n}')
+            group = Group.objects.create(title=f'{n}', slug=f'slug-{n}')
+            Post.objects.create(author=author, group=group, text=f'{n}')
+        self.assertEqual(self.changelist_queries(), before)
+
+    def test_change_form_uses_lightweight_widgets(self):
+        """Автор выбирается по id, группа - через автодополнение"""
+        post = Post.objects.create(author=self.admin, text='Пост')
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=(post.pk,))
+        )
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+        self.assertContains(response, 'admin-autocomplete')
@@ -0,0 +1,109 @@
+import datetime as dt
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group, Post,
+                      User)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.old_posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'{n} Старый пост'
+            )
+            for n in range(3)
+        ]
+        Post.objects.filter(
+            pk__in=[post.pk for post in cls.old_posts]
+        ).update(pub_date=timezone.now() - dt.timedelta(days=400))
+        cls.comment = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Комментарий'
+        )
+        cls.new_posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'{n} Новый пост'
+            )
+            for n in range(10)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def archive(self):
+        call_command(
+            'archive_posts', days=365, batch_size=2, stdout=io.StringIO()
+        )
+
+    def test_old_posts_moved(self):
+        """Старые посты и комментарии переносятся в архив с теми же id"""
+        self.archive()
+        old_ids = {post.pk for post in self.old_posts}
+        self.assertFalse(Post.objects.filter(pk__in=old_ids).exists())
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)), old_ids
+        )
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=self.comment.pk).post_id,
+            self.old_posts[0].pk
+        )
+        self.assertEqual(Post.objects.count(), 10)
+
+    def test_post_detail_falls_through(self):
+        """Архивный пост открывается по старому id, но без формы"""
+        self.archive()
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.old_posts[0].pk,))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий']
+        )
+        self.assertEqual(response.context['posts_count'], 13)
+        self.assertNotContains(
+            response, reverse('posts:post_edit', args=(self.old_posts[0].pk,))
+        )
+
+    def test_deep_pages_read_archive(self):
+        """Вторая страница профиля и группы дочитывает архив"""
+        self.archive()
+        for url in (
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:group_list', args=(self.group.slug,)),
+        ):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertEqual(first.context['page_obj'].paginator.count,
+                                 13)
+                self.assertTrue(all(
+                    isinstance(post, Post)
+                    for post in first.context['page_obj']
+                ))
+                second = self.guest_client.get(url + '?page=2')
+                self.assertEqual(
+                    [post.pk for post in second.context['page_obj']],
+                    [post.pk for post in reversed(self.old_posts)]
+                )
+
+    def test_archive_count_invalidated(self):
+        """Архивация сбрасывает закэшированный счетчик профиля"""
+        url = reverse('posts:profile', args=(self.user.username,))
+        self.guest_client.get(url)
+        self.archive()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+        self.assertEqual(len(response.context['page_obj']), 10)
@@ -0,0 +1,138 @@
+import io
+import datetime as dt
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import bulk_jobs
+from ..models import BulkJob, Group, Post, User
+
+
+class BulkJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(author=self.admin, group=self.group,
+                                text=f'{n} Пост')
+            for n in range(5)
+        ]
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.changelist_url = reverse('admin:posts_post_changelist')
+
+    def run_jobs(self):
+        with mock.patch('time.sleep'):
+            call_command('run_bulk_jobs', chunk_size=2, stdout=io.StringIO())
+
+    def test_delete_action_submits_job(self):
+        """Удаление из админки после подтверждения ставит задание в фон"""
+        data = {
+            'action': 'delete_in_background',
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in self.posts[:3]],
+        }
+        response = self.client.post(self.changelist_url, data)
+        self.assertTemplateUsed(
+            response, 'admin/posts/post/delete_in_background.html'
+        )
+        self.assertFalse(BulkJob.objects.exists())
+        self.client.post(self.changelist_url, {**data, 'apply': '1'})
+        job = BulkJob.objects.get()
+        self.assertEqual((job.total, job.status), (3, BulkJob.PENDING))
+        self.assertEqual(Post.objects.count(), 5)
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.status), (3, BulkJob.DONE))
+        self.assertEqual(
+            set(Post.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.posts[3:]}
+        )
+
+    def test_move_to_group_asks_for_group(self):
+        """Перенос в группу сначала показывает форму выбора группы"""
+        data = {
+            'action': 'move_to_group',
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in self.posts],
+        }
+        response = self.client.post(self.changelist_url, data)
+        self.assertTemplateUsed(
+            response, 'admin/posts/post/move_to_group.html'
+        )
+        self.assertFalse(BulkJob.objects.exists())
+        self.client.post(self.changelist_url, {
+            **data, 'apply': '1', 'group': self.other_group.pk,
+        })
+        self.run_jobs()
+        self.assertEqual(self.other_group.posts.count(), 5)
+        self.assertEqual(self.group.posts.count(), 0)
+
+    def test_job_resumes_from_last_id(self):
+        """Прерванное задание продолжается с последней пачки"""
+        job = bulk_jobs.submit(
+            BulkJob.SET_GROUP, Post.objects.all(), group=self.other_group
+        )
+        ids = bulk_jobs.load_ids(job)
+        bulk_jobs.run_chunk(job, ids, 2)
+        self.assertEqual((job.processed, job.last_id), (2, ids[1]))
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.status), (5, BulkJob.DONE))
+
+    def test_job_claimed_once(self):
+        """Задание в работе не достается второму исполнителю"""
+        job = bulk_jobs.submit(BulkJob.DELETE, Post.objects.all())
+        self.assertEqual(bulk_jobs.next_job(), job)
+        self.assertIsNone(bulk_jobs.next_job())
+
+    def test_stale_job_taken_over(self):
+        """Брошенное задание забирается, прежний исполнитель прерывается"""
+        job = bulk_jobs.submit(
+            BulkJob.SET_GROUP, Post.objects.all(), group=self.other_group
+        )
+        first = bulk_jobs.next_job()
+        BulkJob.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now() - dt.timedelta(hours=1)
+        )
+        second = bulk_jobs.next_job()
+        self.assertEqual(second, job)
+        with self.assertRaises(bulk_jobs.JobLost):
+            bulk_jobs.run_chunk(first, bulk_jobs.load_ids(first), 2)
+        self.assertEqual(self.other_group.posts.count(), 0)
+        with mock.patch('time.sleep'):
+            bulk_jobs.run(second, chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.status), (5, BulkJob.DONE))
+
+    def test_throttling(self):
+        """После пачки исполнитель спит пропорционально ее длительности"""
+        job = bulk_jobs.submit(BulkJob.DELETE, Post.objects.all())
+        with mock.patch.object(bulk_jobs.time, 'sleep') as sleep, \
+                mock.patch.object(bulk_jobs.time, 'monotonic',
+                                  side_effect=[0, 1, 10, 11, 20]):
+            bulk_jobs.run(job, chunk_size=5, duty_cycle=0.25)
+        sleep.assert_called_once_with(3.0)
+
+    def test_group_counts_invalidated(self):
+        """Перенос в группу сбрасывает закэшированные счетчики групп"""
+        url = reverse('posts:group_list', args=(self.other_group.slug,))
+        self.client.get(url)
+        job = bulk_jobs.submit(
+            BulkJob.SET_GROUP, Post.objects.all(), group=self.other_group
+        )
+        with mock.patch('time.sleep'):
+            bulk_jobs.run(job)
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
@@ -0,0 +1,65 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.models import KVStore
+
+from ..models import Post, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RebuildThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        for n in range(3):
+            buffer = io.BytesIO()
+            Image.new('RGB', (2000, 1500), 'red').save(buffer, 'JPEG')
+            Post.objects.create(
+                author=cls.user,
+                text=f'{n} Текстовый пост',
+                image=SimpleUploadedFile(f'big{n}.jpg', buffer.getvalue())
+            )
+        cls.state_file = os.path.join(TEMP_MEDIA_ROOT, 'state')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_rebuild_thumbnails(self):
+        """Команда строит миниатюры и пишет их в KV-хранилище"""
+        call_command(
+            'rebuild_thumbnails', workers=1, chunk_size=2,
+            state_file=self.state_file, stdout=io.StringIO()
+        )
+        self.assertEqual(KVStore.objects.count(), 9)
+        self.assertFalse(os.path.exists(self.state_file))
+        post = Post.objects.first()
+        thumbnail = get_thumbnail(
+            post.image, '960x339', crop='center', upscale=True
+        )
+        self.assertEqual(thumbnail.size, [960, 339])
+        self.assertEqual(KVStore.objects.count(), 9)
+
+    def test_rebuild_thumbnails_resume(self):
+        """Команда продолжает работу с сохраненного поста"""
+        last = Post.objects.order_by('pk')[1]
+        with open(self.state_file, 'w') as file:
+            file.write(f'{{"geometries": ["960x339"], "last_pk": {last.pk}}}')
+        call_command(
+            'rebuild_thumbnails', workers=1, resume=True,
+            state_file=self.state_file, stdout=io.StringIO()
+        )
+        self.assertEqual(KVStore.objects.count(), 3)
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import comment_buffer, trending
+from ..models import Comment, Post, User
+
+
+@override_settings(COMMENT_WRITE_BEHIND=True, COMMENT_FLUSHER_THREAD=False)
+class CommentBufferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.user2 = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(author=cls.user, text='Текстовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.authorized_client2 = Client()
+        self.authorized_client2.force_login(self.user2)
+        self.add_comment_url = reverse(
+            'posts:add_comment', args=[self.post.pk]
+        )
+        self.post_detail_url = reverse(
+            'posts:post_detail', args=[self.post.pk]
+        )
+
+    def tearDown(self):
+        comment_buffer.flush()
+
+    def test_comment_buffered_until_flush(self):
+        """Комментарий пишется в БД только при сбросе очереди"""
+        self.authorized_client.post(
+            self.add_comment_url, {'text': 'Комментарий'}
+        )
+        self.assertFalse(Comment.objects.exists())
+        comment_buffer.flush()
+        self.assertTrue(
+            Comment.objects.filter(post=self.post, text='Комментарий').exists()
+        )
+        trending.persist()
+        self.assertEqual(trending.top_post_ids(), [self.post.pk])
+
+    def test_read_your_writes(self):
+        """Автор сразу видит свой комментарий, другие - после записи"""
+        self.authorized_client.post(
+            self.add_comment_url, {'text': 'Комментарий'}
+        )
+        response = self.authorized_client.get(self.post_detail_url)
+        self.assertEqual(
+            [c.text for c in response.context['pending_comments']],
+            ['Комментарий']
+        )
+        response = self.authorized_client2.get(self.post_detail_url)
+        self.assertEqual(response.context['pending_comments'], [])
+        comment_buffer.flush()
+        response = self.authorized_client.get(self.post_detail_url)
+        self.assertEqual(response.context['pending_comments'], [])
+        self.assertEqual(response.context['comments'].count(), 1)
+
+    def test_missing_post(self):
+        """Комментарий к несуществующему посту дает 404"""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk + 100]),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_signal_gets_pk(self):
+        """post_save после записи пачки получает комментарий с id"""
+        received = []
+
+        def receiver(sender, instance, **kwargs):
+            received.append(instance.pk)
+        post_save.connect(receiver, sender=Comment)
+        self.addCleanup(post_save.disconnect, receiver, sender=Comment)
+        for text in ('Первый', 'Второй'):
+            self.authorized_client.post(self.add_comment_url, {'text': text})
+        comment_buffer.flush()
+        self.assertEqual(
+            sorted(received),
+            sorted(Comment.objects.values_list('pk', flat=True))
+        )
@@ -0,0 +1,182 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.pubsub import brokers, get_broker
+
+from .. import live
+from ..models import Follow, Group, Post, User
+
+
+def read(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@override_settings(
+    SSE_BROKER='local', SSE_HEARTBEAT=0.05, SSE_MAX_DURATION=0.3
+)
+class EventStreamTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        brokers.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.author = User.objects.create_user(username='Author')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_new_post_streamed_to_group(self):
+        """Новый пост приходит подписчикам группы и автора"""
+        group_response = self.client.get(
+            reverse('posts:group_events', args=(self.group.slug,))
+        )
+        author_response = self.client.get(
+            reverse('posts:author_events', args=(self.author.username,))
+        )
+        self.assertEqual(group_response['Content-Type'], 'text/event-stream')
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Живой пост'
+        )
+        for response in (group_response, author_response):
+            with self.subTest(response=response):
+                body = read(response)
+                self.assertTrue(body.startswith('retry: '))
+                self.assertIn('event: post\n', body)
+                self.assertIn(f'"id": {post.pk}', body)
+                self.assertIn('Живой пост', body)
+
+    def test_follow_stream(self):
+        """Лента подписок получает посты только нужных авторов"""
+        Follow.objects.create(user=self.user, author=self.author)
+        stranger = User.objects.create_user(username='Stranger')
+        response = self.authorized_client.get(reverse('posts:follow_events'))
+        Post.objects.create(author=stranger, text='Чужой пост')
+        Post.objects.create(author=self.author, text='Пост автора')
+        body = read(response)
+        self.assertIn('Пост автора', body)
+        self.assertNotIn('Чужой пост', body)
+
+    def test_comment_stream(self):
+        """Комментарии к посту приходят подписчикам поста"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        response = self.client.get(
+            reverse('posts:comment_events', args=(post.pk,))
+        )
+        live.publish_comment(post.comments.create(
+            author=self.user, text='Комментарий'
+        ))
+        self.assertIn('event: comment\n', read(response))
+
+    def test_unknown_targets(self):
+        """Поток для несуществующей группы или поста - 404"""
+        for url in (
+            reverse('posts:group_events', args=('missing',)),
+            reverse('posts:author_events', args=('missing',)),
+            reverse('posts:comment_events', args=(100500,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_heartbeat_and_close(self):
+        """Без событий поток шлет пульс и закрывается по таймауту"""
+        body = read(self.client.get(
+            reverse('posts:group_events', args=(self.group.slug,))
+        ))
+        self.assertIn(': heartbeat\n\n', body)
+        self.assertEqual(get_broker().connections, 0)
+
+    @override_settings(SSE_MAX_CONNECTIONS=1)
+    def test_connection_limit(self):
+        """Сверх SSE_MAX_CONNECTIONS отвечаем 503 с Retry-After"""
+        url = reverse('posts:group_events', args=(self.group.slug,))
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(second.status_code, 503)
+        self.assertIn('Retry-After', second)
+        read(first)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(SSE_MAX_CONNECTIONS=1)
+    def test_unread_stream_releases_slot(self):
+        """Закрытый без чтения ответ освобождает подключение"""
+        url = reverse('posts:group_events', args=(self.group.slug,))
+        response = self.client.get(url)
+        self.assertEqual(get_broker().connections, 1)
+        response.close()
+        self.assertEqual(get_broker().connections, 0)
+        response = self.client.head(url)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(get_broker().connections, 0)
+
+    def test_local_events_without_ids(self):
+        """Локальный брокер не выдает id, которым нельзя верить"""
+        response = self.client.get(
+            reverse('posts:group_events', args=(self.group.slug,))
+        )
+        get_broker().publish(live.group_channel(self.group.pk), 'post', {})
+        body = read(response)
+        self.assertIn('event: post\n', body)
+        self.assertNotIn('id: ', body)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    def test_slow_client_dropped(self):
+        """Переполненная очередь закрывает поток, а не растет"""
+        response = self.client.get(
+            reverse('posts:group_events', args=(self.group.slug,))
+        )
+        broker = get_broker()
+        channel = live.group_channel(self.group.pk)
+        for n in range(5):
+            broker.publish(channel, 'post', {'n': n})
+        body = read(response)
+        self.assertEqual(body.count('event: post'), 0)
+        self.assertEqual(broker.connections, 0)
+
+
+class SQLiteBrokerTests(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        brokers.clear()
+        self.addCleanup(brokers.clear)
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        self.url = reverse('posts:group_events', args=(self.group.slug,))
+        self.channel = live.group_channel(self.group.pk)
+
+    def settings_override(self):
+        return override_settings(
+            SSE_BROKER='sqlite',
+            SSE_BROKER_PATH=os.path.join(self.directory, 'events.sqlite3'),
+            SSE_POLL_INTERVAL=0.02,
+            SSE_HEARTBEAT=0.05,
+            SSE_MAX_DURATION=0.3,
+        )
+
+    def test_events_shared_through_file(self):
+        """События из файла доходят до подписчиков процесса"""
+        with self.settings_override():
+            response = self.client.get(self.url)
+            get_broker().publish(self.channel, 'post', {'id': 1})
+            self.assertIn('data: {"id": 1}', read(response))
+
+    def test_replay_after_reconnect(self):
+        """Переподключение с Last-Event-ID досылает пропущенное"""
+        with self.settings_override():
+            broker = get_broker()
+            for n in range(3):
+                broker.publish(self.channel, 'post', {'id': n})
+            broker.publish(live.group_channel(0), 'post', {'id': 'other'})
+            first_id = broker.read(0)[0][0]
+            body = read(self.client.get(
+                self.url, HTTP_LAST_EVENT_ID=str(first_id)
+            ))
+        self.assertNotIn('{"id": 0}', body)
+        self.assertIn('{"id": 1}', body)
+        self.assertIn('{"id": 2}', body)
+        self.assertNotIn('other', body)
+        self.assertEqual(body.count('{"id": 1}'), 1)
@@ -0,0 +1,139 @@
+import datetime as dt
+
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feed
+from ..models import Follow, Group, GroupFollow, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authors = [
+            User.objects.create_user(username=f'author{n}') for n in range(5)
+        ]
+        cls.groups = [
+            Group.objects.create(title=f'Группа {n}', slug=f'group-{n}')
+            for n in range(3)
+        ]
+        now = timezone.now()
+        for n in range(30):
+            post = Post.objects.create(
+                author=cls.authors[n % 5],
+                group=cls.groups[n % 3],
+                text=f'{n} Пост',
+            )
+            # Посты разных авторов вперемешку и с совпадающими датами.
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - dt.timedelta(minutes=n // 2)
+            )
+        for author in cls.authors[:4]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def expected(self, **filters):
+        return list(
+            Post.objects.filter(**filters).order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    @override_settings(FEED_MAX_PAGES=2)
+    def test_page_number_capped(self):
+        """Номера страниц ленты ограничены, глубже - фрагменты"""
+        url = reverse('posts:follow_index')
+        response = self.authorized_client.get(url, {'page': 3})
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(
+            [post.pk for post in page],
+            self.expected(author__in=self.authors[:4])[10:20]
+        )
+
+    def test_follow_index_merges_authors(self):
+        """Лента подписок - слияние авторов в порядке (pub_date, id)"""
+        expected = self.expected(author__in=self.authors[:4])
+        url = reverse('posts:follow_index')
+        seen = []
+        for page in (1, 2, 3):
+            response = self.authorized_client.get(url, {'page': page})
+            page_obj = response.context['page_obj']
+            self.assertIs(type(page_obj), Page)
+            self.assertEqual(page_obj.paginator.count, len(expected))
+            seen += [post.pk for post in page_obj]
+        self.assertEqual(seen, expected)
+
+    @override_settings(FEED_MAX_STREAMS=2, FEED_BATCH_SIZE=3)
+    def test_streams_limit_queries(self):
+        """Страница ленты стоит не больше FEED_MAX_STREAMS запросов"""
+        posts = feed.following([author.pk for author in self.authors])
+        posts.count()
+        with self.assertNumQueries(2):
+            page = posts[:3]
+        self.assertEqual(
+            [post.pk for post in page], self.expected()[:3]
+        )
+        self.assertEqual(
+            [post.pk for post in posts[:12]], self.expected()[:12]
+        )
+
+    def test_merge_skips_duplicates(self):
+        """Пост из двух источников попадает в ленту один раз"""
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        merged = list(feed.merge([
+            feed.stream(posts.filter(author=self.authors[0])),
+            feed.stream(posts.filter(group=self.groups[0])),
+        ]))
+        sources = (set(self.expected(author=self.authors[0]))
+                   | set(self.expected(group=self.groups[0])))
+        self.assertEqual(
+            [post.pk for post in merged],
+            [pk for pk in self.expected() if pk in sources]
+        )
+
+    def test_group_feed(self):
+        """Подписка на группы дает ленту из их постов"""
+        for group in self.groups[:2]:
+            self.authorized_client.get(
+                reverse('posts:group_follow', args=(group.slug,))
+            )
+        self.assertEqual(GroupFollow.objects.filter(user=self.user).count(),
+                         2)
+        response = self.authorized_client.get(
+            reverse('posts:group_follow_index')
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.expected(group__in=self.groups[:2])[:10]
+        )
+        response = self.authorized_client.get(
+            reverse('posts:group_list', args=(self.groups[0].slug,))
+        )
+        self.assertTrue(response.context['following'])
+        self.authorized_client.get(
+            reverse('posts:group_unfollow', args=(self.groups[0].slug,))
+        )
+        response = self.authorized_client.get(
+            reverse('posts:group_follow_index')
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 10)
+
+    def test_fragment_continues_feed(self):
+        """Фрагменты ленты подписок продолжаются по курсору без повторов"""
+        url = reverse('posts:follow_fragment')
+        seen = []
+        while url:
+            response = self.authorized_client.get(url)
+            seen += [post.pk for post in response.context['posts']]
+            url = response.context['next_url']
+        self.assertEqual(seen, self.expected(author__in=self.authors[:4]))
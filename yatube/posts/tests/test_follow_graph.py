@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from .. import follow_graph
+from ..models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authors = [
+            User.objects.create_user(username=f'author{n}') for n in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_following_among(self):
+        """Пакетная проверка подписок не обращается к БД повторно"""
+        Follow.objects.create(user=self.user, author=self.authors[3])
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        author_ids = [author.pk for author in self.authors]
+        follow_graph.following_ids(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                follow_graph.following_among(self.user.pk, author_ids),
+                {self.authors[1].pk, self.authors[3].pk}
+            )
+
+    def test_reset_on_change(self):
+        """Подписка и отписка сбрасывают граф в кэше"""
+        self.assertFalse(
+            follow_graph.is_following(self.user.pk, self.authors[0].pk)
+        )
+        self.assertEqual(follow_graph.follower_count(self.authors[0].pk), 0)
+        follow = Follow.objects.create(user=self.user, author=self.authors[0])
+        self.assertTrue(
+            follow_graph.is_following(self.user.pk, self.authors[0].pk)
+        )
+        self.assertEqual(follow_graph.follower_count(self.authors[0].pk), 1)
+        follow.delete()
+        self.assertFalse(
+            follow_graph.is_following(self.user.pk, self.authors[0].pk)
+        )
+        self.assertEqual(follow_graph.follower_count(self.authors[0].pk), 0)
+
+
+class FollowGraphCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.author = User.objects.create_user(username='author')
+
+    def test_reset_after_commit(self):
+        """Граф, перечитанный до коммита подписки, сбрасывается после него"""
+        with transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+            # Другой процесс еще не видит подписку и кэширует граф без нее.
+            follow_graph._set(follow_graph.following_key(self.user.pk),
+                              follow_graph.array('I').tobytes())
+            follow_graph._set(follow_graph.followers_key(self.author.pk), 0)
+        self.assertTrue(
+            follow_graph.is_following(self.user.pk, self.author.pk)
+        )
+        self.assertEqual(follow_graph.follower_count(self.author.pk), 1)
+
+    def test_rollback(self):
+        """Откаченная подписка не попадает в граф"""
+        follow_graph.following_ids(self.user.pk)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+            raise RuntimeError
+        self.assertFalse(
+            follow_graph.is_following(self.user.pk, self.author.pk)
+        )
@@ -0,0 +1,100 @@
+import datetime as dt
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import cursors
+from ..models import Follow, Group, Post, User
+
+
+class FragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.posts = [
+            Post.objects.create(author=cls.user, group=cls.group,
+                                text=f'{n} Текстовый пост')
+            for n in range(15)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def load_all(self, client, url):
+        """Проходит ленту по курсорам, возвращает id постов по порядку."""
+        ids = []
+        next_url = url
+        while next_url:
+            response = client.get(next_url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(post.pk for post in response.context['posts'])
+            next_url = response.context['next_url']
+        return ids
+
+    def test_fragment_without_layout(self):
+        """Фрагмент содержит карточки и курсор, но не макет страницы"""
+        response = self.guest_client.get(reverse('posts:index_fragment'))
+        self.assertTemplateUsed(response, 'posts/fragments/posts.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertIn(response['X-Next-Cursor'],
+                      response.context['next_url'])
+
+    def test_all_feeds_walk_to_the_end(self):
+        """По курсорам любая лента проходится целиком и без повторов"""
+        expected = [post.pk for post in reversed(self.posts)]
+        for client, url in (
+            (self.guest_client, reverse('posts:index_fragment')),
+            (self.guest_client,
+             reverse('posts:group_fragment', args=(self.group.slug,))),
+            (self.guest_client,
+             reverse('posts:profile_fragment', args=(self.user.username,))),
+            (self.reader_client, reverse('posts:follow_fragment')),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.load_all(client, url), expected)
+
+    def test_equal_dates_not_skipped(self):
+        """Посты с одинаковой датой не теряются на границе порций"""
+        Post.objects.update(pub_date=timezone.now())
+        ids = self.load_all(self.guest_client,
+                            reverse('posts:index_fragment'))
+        self.assertEqual(
+            ids, sorted((post.pk for post in self.posts), reverse=True)
+        )
+
+    def test_profile_continues_into_archive(self):
+        """Лента профиля продолжается архивными постами"""
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.posts[:3]]
+        ).update(pub_date=timezone.now() - dt.timedelta(days=400))
+        call_command('archive_posts', days=365, stdout=io.StringIO())
+        ids = self.load_all(
+            self.guest_client,
+            reverse('posts:profile_fragment', args=(self.user.username,))
+        )
+        self.assertEqual(ids[-3:], [post.pk for post in self.posts[2::-1]])
+        self.assertEqual(len(ids), 15)
+
+    def test_bad_cursor(self):
+        response = self.guest_client.get(
+            reverse('posts:index_fragment'), {'after': 'испорчен'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        post = self.posts[0]
+        self.assertEqual(
+            cursors.decode(cursors.encode(post)), (post.pub_date, post.pk)
+        )
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import latest
+from ..models import Follow, Group, Post, User
+
+
+class NewPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Текстовый пост')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            (self.guest_client, reverse('posts:index_new')),
+            (self.guest_client,
+             reverse('posts:group_new', args=(self.group.slug,))),
+            (self.authorized_client, reverse('posts:follow_new')),
+        )
+
+    def test_nothing_new_costs_no_sql(self):
+        """Опрос без новых постов не обращается к БД"""
+        for client, url in self.urls:
+            with self.subTest(url=url):
+                data = client.get(url, {'since': self.post.pk}).json()
+                self.assertEqual(data['count'], 0)
+                with self.assertNumQueries(0):
+                    data = client.get(url, {'since': self.post.pk}).json()
+                self.assertEqual(data['latest'], self.post.pk)
+
+    def test_new_posts_returned(self):
+        """Новые посты приходят числом и карточками"""
+        for client, url in self.urls:
+            client.get(url, {'since': self.post.pk})
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Свежий пост')
+        for client, url in self.urls:
+            with self.subTest(url=url):
+                data = client.get(url, {'since': self.post.pk}).json()
+                self.assertEqual(data['count'], 1)
+                self.assertEqual(data['latest'], post.pk)
+                self.assertIn('Свежий пост', data['html'])
+                self.assertNotIn('Текстовый пост', data['html'])
+
+    def test_other_authors_not_in_follow_feed(self):
+        """Посты неотслеживаемых авторов не считаются новыми в подписках"""
+        url = reverse('posts:follow_new')
+        self.authorized_client.get(url, {'since': self.post.pk})
+        Post.objects.create(author=self.user, text='Свой пост')
+        data = self.authorized_client.get(url, {'since': self.post.pk}).json()
+        self.assertEqual(data['count'], 0)
+
+    def test_group_change_resets_latest(self):
+        """Перенос поста в другую группу обновляет ее последний id"""
+        other = Group.objects.create(title='Другая', slug='other')
+        url = reverse('posts:group_new', args=(other.slug,))
+        self.assertEqual(self.guest_client.get(url).json()['latest'], 0)
+        self.post.group = other
+        self.post.save()
+        data = self.guest_client.get(url, {'since': 0}).json()
+        self.assertEqual((data['count'], data['latest']), (1, self.post.pk))
+
+    def test_unknown_group(self):
+        response = self.guest_client.get(
+            reverse('posts:group_new', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_latest_from_rendered_posts(self):
+        """latest - id отданных постов, а не еще не видимого в БД"""
+        url = reverse('posts:index_new')
+        # Пост другой транзакции уже в кэше, но еще не закоммичен.
+        cache.set(latest.index_key(), self.post.pk + 100)
+        data = self.guest_client.get(url, {'since': self.post.pk}).json()
+        self.assertEqual((data['count'], data['latest']), (0, self.post.pk))
+
+    def test_slug_key_is_safe(self):
+        """Ключ slug не содержит сырого slug"""
+        key = latest.slug_key('группа с пробелом')
+        self.assertNotIn(' ', key)
+        self.assertTrue(key.isascii())
+
+
+class LatestCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        self.post = Post.objects.create(author=self.author, text='Первый')
+        self.url = reverse('posts:index_new')
+
+    def test_latest_reset_after_commit(self):
+        """Ключ, пересчитанный до коммита поста, сбрасывается после него"""
+        with transaction.atomic():
+            post = Post.objects.create(author=self.author, text='Второй')
+            cache.set(latest.index_key(), self.post.pk)
+        data = self.client.get(self.url, {'since': self.post.pk}).json()
+        self.assertEqual((data['count'], data['latest']), (1, post.pk))
@@ -0,0 +1,83 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import counts, page_cache
+from ..models import Group, Post, User
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'{n} Пост'
+            )
+            for n in range(13)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:group_list', args=(self.group.slug,))
+        self.key = counts.page_key(counts.group_key(self.group.pk), 1)
+
+    def page_ids(self, response):
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_page_cached_as_ids(self):
+        """В кэше страницы лежат только id постов"""
+        first = self.guest_client.get(self.url)
+        self.assertEqual(
+            list(page_cache.unpack(cache.get(self.key)[1])),
+            self.page_ids(first)
+        )
+        self.assertEqual(self.page_ids(self.guest_client.get(self.url)),
+                         self.page_ids(first))
+
+    def test_edit_visible_without_invalidation(self):
+        """Правка текста видна сразу: посты поднимаются по id"""
+        self.guest_client.get(self.url)
+        post = Post.objects.get(pk=self.posts[-1].pk)
+        Post.objects.filter(pk=post.pk).update(text='Исправленный текст')
+        self.assertContains(self.guest_client.get(self.url),
+                            'Исправленный текст')
+
+    def test_new_post_resets_pages(self):
+        """Новый пост сбрасывает закэшированные страницы ленты"""
+        self.guest_client.get(self.url)
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Свежий'
+        )
+        self.assertIsNone(cache.get(self.key))
+        response = self.guest_client.get(self.url)
+        self.assertEqual(self.page_ids(response)[0], post.pk)
+
+    def test_invalidation_during_read(self):
+        """Страница, прочитанная до сброса, не принимается из кэша"""
+        count_key = counts.group_key(self.group.pk)
+        queryset = self.group.posts.select_related('author', 'group')
+
+        class Racing(list):
+            def __getitem__(self, index):
+                # Пост создан, пока страница читалась из БД.
+                counts.invalidate_pages(count_key)
+                return super().__getitem__(index)
+
+        page_cache.CachedPages(Racing(queryset), count_key)[0:10]
+        self.assertEqual(
+            page_cache.CachedPages(queryset.none(), count_key)[0:10], []
+        )
+
+    def test_benchmark_command(self):
+        """Замер сравнивает pickle и список id"""
+        out = io.StringIO()
+        call_command('bench_page_cache', repeat=2, stdout=out)
+        self.assertIn('pickle Post', out.getvalue())
+        self.assertIn('array id + in_bulk', out.getvalue())
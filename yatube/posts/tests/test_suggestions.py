@@ -0,0 +1,64 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Suggestion, User
+from ..suggestions import recompute
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user, cls.user2, cls.x, cls.y, cls.z = [
+            User.objects.create_user(username=name)
+            for name in ('HasNoName', 'NoName', 'x', 'y', 'z')
+        ]
+        for user, author in (
+            (cls.user, cls.x), (cls.user, cls.y),
+            (cls.user2, cls.x), (cls.user2, cls.z),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_recompute_suggestions(self):
+        """Рекомендуются авторы, на которых подписаны похожие пользователи"""
+        call_command('recompute_suggestions', stdout=io.StringIO())
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=self.user)
+                 .values_list('author', flat=True)),
+            [self.z.pk]
+        )
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=self.user2)
+                 .values_list('author', flat=True)),
+            [self.y.pk]
+        )
+
+    def test_recompute_only_changed(self):
+        """Повторный пересчет затрагивает только изменившихся"""
+        self.assertEqual(recompute(), 2)
+        self.assertEqual(recompute(), 0)
+        Follow.objects.filter(user=self.user2, author=self.x).delete()
+        self.assertEqual(recompute(), 1)
+        self.assertFalse(Suggestion.objects.filter(user=self.user2).exists())
+        self.assertEqual(recompute(recompute_all=True), 2)
+        self.assertFalse(Suggestion.objects.filter(user=self.user).exists())
+
+    def test_follow_page_shows_suggestions(self):
+        """Рекомендации выводятся в ленте подписок"""
+        recompute()
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [s.author for s in response.context['suggestions']], [self.z]
+        )
+        Follow.objects.create(user=self.user, author=self.z)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'], [])
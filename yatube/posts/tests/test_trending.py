@@ -0,0 +1,110 @@
+import datetime as dt
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Post, PostScore, TrendingState, User
+
+
+@override_settings(TRENDING_PERSIST_EVERY=1)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'{n} Текстовый пост')
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.trending_url = reverse('posts:trending')
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.user, text='Да')
+
+    def test_trending_order(self):
+        """Посты упорядочены по активности комментариев"""
+        self.comment(self.posts[0], 1)
+        self.comment(self.posts[2], 3)
+        trending.persist()
+        response = self.guest_client.get(self.trending_url)
+        self.assertEqual(
+            response.context['posts'], [self.posts[2], self.posts[0]]
+        )
+
+    @override_settings(TRENDING_PERSIST_EVERY=100)
+    def test_recent_comments_weigh_more(self):
+        """Свежий комментарий весит больше старого"""
+        self.comment(self.posts[0], 2)
+        Comment.objects.update(pub_date=timezone.now() - dt.timedelta(days=1))
+        self.comment(self.posts[1], 1)
+        trending.persist()
+        self.assertEqual(
+            trending.top_post_ids(),
+            [self.posts[1].pk, self.posts[0].pk]
+        )
+
+    def test_persist_and_reload(self):
+        """Топ сохраняется в БД и восстанавливается без агрегации"""
+        self.comment(self.posts[1], 2)
+        self.comment(self.posts[0], 1)
+        call_command('persist_trending', stdout=io.StringIO())
+        self.assertEqual(PostScore.objects.count(), 2)
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(self.trending_url)
+        self.assertEqual(
+            response.context['posts'], [self.posts[1], self.posts[0]]
+        )
+
+    @override_settings(TRENDING_PERSIST_EVERY=100)
+    def test_comments_counted_once(self):
+        """Повторный пересчет не учитывает комментарий дважды"""
+        self.comment(self.posts[0], 1)
+        self.assertEqual(trending.persist(), 1)
+        self.assertEqual(trending.persist(), 0)
+        self.comment(self.posts[0], 1)
+        stale = TrendingState.objects.get()
+        self.assertEqual(trending.persist(), 1)
+        score = PostScore.objects.get().score
+        # Второй процесс прочитал отметку до того, как первый ее сдвинул.
+        with mock.patch.object(TrendingState.objects, 'get_or_create',
+                               return_value=(stale, False)):
+            self.assertEqual(trending.persist(), 0)
+        self.assertEqual(PostScore.objects.get().score, score)
+
+    @override_settings(TRENDING_PERSIST_EVERY=100)
+    def test_persist_in_chunks(self):
+        """persist() учитывает одну пачку, команда - все остальное"""
+        self.comment(self.posts[0], 2)
+        self.comment(self.posts[1], 3)
+        self.assertEqual(trending.persist(limit=2), 1)
+        self.assertEqual(PostScore.objects.get().post_id, self.posts[0].pk)
+        self.assertEqual(trending.catch_up(limit=2), 2)
+        self.assertEqual(
+            trending.top_post_ids(), [self.posts[1].pk, self.posts[0].pk]
+        )
+
+
+@override_settings(TRENDING_PERSIST_EVERY=2)
+class TrendingCommitTests(TransactionTestCase):
+    def test_persist_after_commit(self):
+        """Каждый TRENDING_PERSIST_EVERY комментарий пересчитывает оценки"""
+        cache.clear()
+        user = User.objects.create_user(username='HasNoName')
+        post = Post.objects.create(author=user, text='Текстовый пост')
+        Comment.objects.create(post=post, author=user, text='Да')
+        self.assertFalse(PostScore.objects.exists())
+        Comment.objects.create(post=post, author=user, text='Да')
+        self.assertEqual(trending.top_post_ids(), [post.pk])
@@ -4,10 +4,13 @@ import tempfile
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
-from django.test import Client, TestCase, override_settings
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
 from django.urls import reverse
 from django import forms
 
+from .. import counts
 from ..models import Comment, Follow, Post, Group, User
 
 
@@ -143,6 +146,16 @@ class PostViewsTests(TestCase):
         response = self.authorized_client.get(self.group_list_url + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_group_list_count_invalidated(self):
+        """Кэш счетчика постов группы сбрасывается при создании поста"""
+        response = self.authorized_client.get(self.group_list_url + '?page=2')
+        self.assertEqual(len(response.context['page_obj']), 3)
+        Post.objects.create(
+            author=self.user, group=self.group, text='Новый пост'
+        )
+        response = self.authorized_client.get(self.group_list_url + '?page=2')
+        self.assertEqual(len(response.context['page_obj']), 4)
+
     def test_profile_url_page_show_correct_context(self):
         """"Шаблон profile_url сформирован с правильным контекстом """
         """Список постов отфильтрованных по пользователю"""
@@ -252,6 +265,19 @@ class PostViewsTests(TestCase):
                 author=PostViewsTests.user).exists()
         )
 
+    def test_profile_following_context(self):
+        """Кнопка подписки на профиле отражает текущую подписку"""
+        response = self.authorized_client2.get(self.profile_url)
+        self.assertFalse(response.context['following'])
+        self.authorized_client2.get(self.profile_follow_url)
+        response = self.authorized_client2.get(self.profile_url)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['followers_count'], 1)
+        self.authorized_client2.get(self.unprofile_follow_url)
+        response = self.authorized_client2.get(self.profile_url)
+        self.assertFalse(response.context['following'])
+        self.assertEqual(response.context['followers_count'], 0)
+
     def test_cant_follow_youself(self):
         """Нельзя подписаться на самого себя"""
         self.authorized_client.get(self.profile_follow_url)
@@ -270,3 +296,21 @@ class PostViewsTests(TestCase):
         """Новая запись появляется в ленте тех, кто на него подписан"""
         response = self.authorized_client2.get(self.follow_index_url)
         self.assertEqual(len(response.context['page_obj']), 0)
+
+
+class PostCountCommitTests(TransactionTestCase):
+    def test_count_reset_after_commit(self):
+        """Счетчик, посчитанный до коммита поста, сбрасывается после него"""
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        group = Group.objects.create(title='Группа', slug='test-slug')
+        key = counts.group_key(group.pk)
+        with transaction.atomic():
+            Post.objects.create(author=user, group=group, text='Пост')
+            # Другой запрос еще не видит пост и кэширует старое число.
+            cache.set(key, 0)
+        self.assertIsNone(cache.get(key))
+        response = self.client.get(
+            reverse('posts:group_list', args=(group.slug,))
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
@@ -0,0 +1,133 @@
+import datetime as dt
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import windows
+from ..models import Group, Post, User
+
+
+@override_settings(GROUP_WINDOW_SIZE=4)
+class GroupWindowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {n}', slug=f'group-{n}')
+            for n in range(3)
+        ]
+        now = timezone.now()
+        for n in range(15):
+            post = Post.objects.create(
+                author=cls.user, group=cls.groups[n % 3], text=f'{n} Пост'
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - dt.timedelta(minutes=n // 2)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self, groups):
+        return list(
+            Post.objects.filter(group__in=groups).order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def window_ids(self, group):
+        complete, entries = windows.windows([group.pk])[group.pk]
+        return [pk for _, pk in entries]
+
+    def test_pages_match_database_order(self):
+        """Страницы из окон и дочитанные из БД идут в порядке ленты"""
+        posts = windows.GroupFeed([group.pk for group in self.groups[:2]])
+        expected = self.expected(self.groups[:2])
+        self.assertEqual(posts.count(), len(expected))
+        for start, stop in ((0, 3), (3, 6), (6, 10), (0, None)):
+            with self.subTest(start=start, stop=stop):
+                self.assertEqual(
+                    [post.pk for post in posts[start:stop]],
+                    expected[start:stop]
+                )
+
+    def test_first_page_single_query(self):
+        """Страница внутри окон - одно чтение кэша и один in_bulk"""
+        posts = windows.GroupFeed([group.pk for group in self.groups])
+        posts[:3]
+        with self.assertNumQueries(1):
+            page = posts[:3]
+        self.assertEqual([post.pk for post in page],
+                         self.expected(self.groups)[:3])
+
+    def test_complete_window(self):
+        """Окно маленькой группы полное и не требует дочитывания"""
+        group = Group.objects.create(title='Маленькая', slug='small')
+        post = Post.objects.create(author=self.user, group=group, text='Пост')
+        posts = windows.GroupFeed([group.pk])
+        posts[:10]
+        with self.assertNumQueries(1):
+            self.assertEqual([item.pk for item in posts[:10]], [post.pk])
+
+
+@override_settings(GROUP_WINDOW_SIZE=4)
+class GroupWindowUpdateTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.groups = [
+            Group.objects.create(title=f'Группа {n}', slug=f'group-{n}')
+            for n in range(2)
+        ]
+        for n in range(10):
+            Post.objects.create(
+                author=self.user, group=self.groups[n % 2], text=f'{n} Пост'
+            )
+
+    def expected(self, groups):
+        return list(
+            Post.objects.filter(group__in=groups).order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def window_ids(self, group):
+        complete, entries = windows.windows([group.pk])[group.pk]
+        return [pk for _, pk in entries]
+
+    def test_window_follows_changes(self):
+        """Создание, перенос и удаление поста обновляют окна"""
+        group, other = self.groups[:2]
+        self.window_ids(group)
+        self.window_ids(other)
+        post = Post.objects.create(author=self.user, group=group, text='Новый')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.window_ids(group)[0], post.pk)
+        post.group = other
+        post.save()
+        self.assertNotIn(post.pk, self.window_ids(group))
+        self.assertEqual(self.window_ids(other)[0], post.pk)
+        post.delete()
+        self.assertNotIn(post.pk, self.window_ids(other))
+        self.assertEqual(self.window_ids(other),
+                         self.expected([other])[:len(self.window_ids(other))])
+
+    def test_rollback_leaves_window(self):
+        """Откаченный пост не попадает в окно"""
+        group = self.groups[0]
+        before = self.window_ids(group)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Post.objects.create(author=self.user, group=group, text='Откат')
+            raise RuntimeError
+        self.assertEqual(self.window_ids(group), before)
+
+    def test_concurrent_change_drops_window(self):
+        """Правка поверх чужой правки не патчит окно, а сбрасывает его"""
+        group = self.groups[0]
+        self.window_ids(group)
+        # Другой процесс увеличил версию, но окно еще не записал.
+        cache.incr(windows.version_key(group.pk))
+        post = Post.objects.create(author=self.user, group=group, text='Пост')
+        self.assertIsNone(cache.get(windows.window_key(group.pk)))
+        self.assertEqual(self.window_ids(group)[0], post.pk)
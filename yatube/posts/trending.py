@@ -0,0 +1,136 @@
+"""Популярные посты по активности комментариев.
+
+Каждый комментарий добавляет к оценке поста 2 ** ((t - эпоха) / период),
+то есть свежие комментарии весят больше старых. Оценка хранится в виде
+логарифма, поэтому не переполняется и не требует пересчета со временем.
+
+Источник правды - таблица PostScore. persist() добавляет к оценкам
+пачку комментариев с id больше TrendingState.last_comment_id и сдвигает
+эту отметку в той же транзакции, так что каждый комментарий учитывается
+ровно один раз, даже если persist() запущен в нескольких процессах.
+Расчет опирается на то, что id комментариев растут в порядке коммитов,
+как в SQLite с одним писателем. В кэше лежит только список id топа,
+после persist() он сбрасывается.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Comment, Post, PostScore, TrendingState
+
+TOP_KEY = 'trending:top'
+PENDING_KEY = 'trending:pending'
+EPOCH = 1577836800  # 2020-01-01
+
+
+def comment_weight(timestamp):
+    """Логарифм вклада одного комментария."""
+    return (
+        (timestamp - EPOCH) / settings.TRENDING_HALF_LIFE * math.log(2)
+    )
+
+
+def log_add(a, b):
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def record_comment():
+    """Отмечает комментарий; каждый TRENDING_PERSIST_EVERY - пересчет.
+
+    Пересчет идет после коммита и учитывает одну пачку комментариев;
+    накопившееся сверх нее догоняет команда persist_trending.
+    """
+    cache.add(PENDING_KEY, 0, None)
+    try:
+        pending = cache.incr(PENDING_KEY)
+    except ValueError:
+        # Счетчик вытеснен: оценки догонит следующий вызов или команда.
+        return
+    if pending % settings.TRENDING_PERSIST_EVERY == 0:
+        transaction.on_commit(persist)
+
+
+def _persist_chunk(limit):
+    """Учитывает до limit комментариев; (их число, число оценок)."""
+    state, _ = TrendingState.objects.get_or_create(pk=1)
+    last = state.last_comment_id
+    comments = list(
+        Comment.objects.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', 'post_id', 'pub_date'
+        )[:limit]
+    )
+    if not comments:
+        return 0, 0
+    added = {}
+    for _, post_id, pub_date in comments:
+        added[post_id] = log_add(
+            added.get(post_id), comment_weight(pub_date.timestamp())
+        )
+    with transaction.atomic():
+        # Условный UPDATE первым: параллельный persist() с той же
+        # отметкой ничего не изменит.
+        moved = TrendingState.objects.filter(
+            pk=1, last_comment_id=last
+        ).update(last_comment_id=comments[-1][0])
+        if not moved:
+            return 0, 0
+        scores = dict(
+            PostScore.objects.filter(post_id__in=added).values_list(
+                'post_id', 'score'
+            )
+        )
+        existing = set(
+            Post.objects.filter(pk__in=added).values_list('pk', flat=True)
+        )
+        rows = [
+            PostScore(post_id=post_id, score=log_add(scores.get(post_id),
+                                                     weight))
+            for post_id, weight in added.items() if post_id in existing
+        ]
+        PostScore.objects.filter(
+            post_id__in=[row.post_id for row in rows]
+        ).delete()
+        PostScore.objects.bulk_create(rows)
+    cache.delete(TOP_KEY)
+    return len(comments), len(rows)
+
+
+def persist(limit=None):
+    """Добавляет к оценкам пачку еще не учтенных комментариев.
+
+    Пачка - до limit (по умолчанию TRENDING_PERSIST_CHUNK) комментариев
+    по возрастанию id. Возвращает число обновленных оценок.
+    """
+    return _persist_chunk(limit or settings.TRENDING_PERSIST_CHUNK)[1]
+
+
+def catch_up(limit=None):
+    """Учитывает все накопленные комментарии пачками по limit."""
+    limit = limit or settings.TRENDING_PERSIST_CHUNK
+    total = 0
+    while True:
+        comments, scores = _persist_chunk(limit)
+        total += scores
+        if comments < limit:
+            return total
+
+
+def top_post_ids(limit=None):
+    """id популярных постов по убыванию оценки, без агрегирующих запросов."""
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = list(PostScore.objects.values_list('post_id', flat=True)[
+            :settings.TRENDING_SIZE
+        ])
+        cache.set(TOP_KEY, top, settings.TRENDING_TOP_TIMEOUT)
+    return top[:limit]
+
+
+def forget(post_id):
+    """Убирает удаленный пост из топа; его оценка удаляется каскадно."""
+    cache.delete(TOP_KEY)
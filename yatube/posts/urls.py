@@ -15,6 +15,33 @@ urlpatterns = [
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/groups/', views.group_follow_index,
+         name='group_follow_index'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('fragments/index/', views.index_fragment, name='index_fragment'),
+    path(
+        'fragments/group/<slug:slug>/',
+        views.group_fragment,
+        name='group_fragment'
+    ),
+    path(
+        'fragments/profile/<str:username>/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
+    path('fragments/follow/', views.follow_fragment, name='follow_fragment'),
+    path('fragments/follow/groups/', views.group_follow_fragment,
+         name='group_follow_fragment'),
+    path('new/index/', views.index_new, name='index_new'),
+    path('new/group/<slug:slug>/', views.group_new, name='group_new'),
+    path('new/follow/', views.follow_new, name='follow_new'),
+    path('events/group/<slug:slug>/', views.group_events,
+         name='group_events'),
+    path('events/profile/<str:username>/', views.author_events,
+         name='author_events'),
+    path('events/follow/', views.follow_events, name='follow_events'),
+    path('events/posts/<int:post_id>/comments/', views.comment_events,
+         name='comment_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -25,4 +52,8 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('group/<slug:slug>/follow/', views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/', views.group_unfollow,
+         name='group_unfollow'),
 ]
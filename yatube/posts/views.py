@@ -1,24 +1,51 @@
-from django.core.paginator import Paginator
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.views.decorators.cache import cache_page
 
+from core import sse
+from core.middleware.compression import compress_page
+
+from . import (archive, comment_buffer, counts, cursors, feed,
+               follow_graph, latest, live, page_cache, trending, windows)
 from .forms import PostForm, CommentForm
-from .models import Follow, Post, Group, User
+from .models import (ArchivedPost, Follow, GroupFollow, Post, Group,
+                     Suggestion, User)
+
 
+def suggestions(user, exclude=()):
+    if not user.is_authenticated:
+        return []
+    suggested = [
+        suggestion for suggestion in Suggestion.objects.filter(
+            user=user
+        ).select_related('author')[:settings.SUGGESTIONS_SHOWN]
+        if suggestion.author_id not in exclude
+    ]
+    # Рекомендации пересчитываются пакетно, поэтому отсеиваем авторов,
+    # на которых пользователь подписался уже после пересчета.
+    following = follow_graph.following_among(
+        user.pk, [suggestion.author_id for suggestion in suggested]
+    )
+    return [suggestion for suggestion in suggested
+            if suggestion.author_id not in following]
 
-def paginator(request, queryset):
-    paginator = Paginator(queryset, 10)
+
+def paginator(request, queryset, count_key=None):
+    paginator = counts.paginator(queryset, count_key)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
 @cache_page(1200, key_prefix='index_page')
+@compress_page
 def index(request):
     template = 'posts/index.html'
     post_list = Post.objects.all()
     context = {
-        'page_obj': paginator(request, post_list),
+        'page_obj': paginator(request, post_list, counts.index_key()),
     }
     return render(request, template, context)
 
@@ -26,10 +53,18 @@ def index(request):
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
-    posts = group.posts.select_related('group')
+    count_key = counts.group_key(group.pk)
+    posts = page_cache.CachedPages(counts.with_archive(
+        group.posts.select_related('group'),
+        group.archived_posts.select_related('group'),
+        count_key,
+    ), count_key)
     context = {
         'group': group,
         'page_obj': paginator(request, posts),
+        'following': request.user.is_authenticated and (
+            GroupFollow.objects.filter(user=request.user, group=group).exists()
+        ),
     }
     return render(request, template, context)
 
@@ -37,28 +72,48 @@ def group_posts(request, slug):
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     template = 'posts/profile.html'
-    posts = author.posts.select_related('author')
-    following = (
-        request.user.is_authenticated and Follow.objects.filter(
-            user=request.user, author=author).exists()
-    )
+    count_key = counts.author_key(author.pk)
+    posts = page_cache.CachedPages(counts.with_archive(
+        author.posts.select_related('author'),
+        author.archived_posts.select_related('author'),
+        count_key,
+    ), count_key)
     context = {
         'page_obj': paginator(request, posts),
         'author': author,
-        'following': following,
+        'following': follow_graph.is_following(request.user.pk, author.pk),
+        'followers_count': follow_graph.follower_count(author.pk),
+        'suggestions': suggestions(request.user, exclude=(author.pk,)),
+    }
+    return render(request, template, context)
+
+
+def trending_posts(request):
+    template = 'posts/trending.html'
+    post_ids = trending.top_post_ids(settings.TRENDING_SHOWN)
+    posts = Post.objects.select_related('author', 'group').in_bulk(post_ids)
+    context = {
+        'posts': [posts[pk] for pk in post_ids if pk in posts],
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = archive.get_post(post_id)
     template = 'posts/post_detail.html'
     comments = post.comments.all()
     form = CommentForm(request.POST)
     context = {
         'post': post,
+        'is_archived': isinstance(post, ArchivedPost),
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'pending_comments': comment_buffer.pending_for(post.pk, request.user),
+        'posts_count': counts.with_archive(
+            post.author.posts.all(),
+            post.author.archived_posts.all(),
+            counts.author_key(post.author_id),
+        ).count(),
     }
     return render(request, template, context)
 
@@ -96,20 +151,44 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if settings.COMMENT_WRITE_BEHIND:
+        if not comment_buffer.post_exists(post_id):
+            raise Http404
+    else:
+        get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment.post_id = post_id
+        if settings.COMMENT_WRITE_BEHIND:
+            comment_buffer.enqueue(comment)
+        else:
+            comment.save()
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = feed.following(follow_graph.following_ids(request.user.pk))
+    context = {
+        'page_obj': paginator(request, posts),
+        'suggestions': suggestions(request.user),
+    }
+    return render(request, template, context)
+
+
+def followed_groups(user):
+    return GroupFollow.objects.filter(user=user).values_list(
+        'group_id', flat=True
+    )
+
+
+@login_required
+def group_follow_index(request):
+    template = 'posts/follow_groups.html'
+    posts = windows.GroupFeed(followed_groups(request.user))
     context = {
         'page_obj': paginator(request, posts),
     }
@@ -135,3 +214,162 @@ def profile_unfollow(request, username):
         author=author
     ).delete()
     return redirect('posts:profile', username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.filter(user=request.user, group=group).delete()
+    return redirect('posts:group_list', slug)
+
+
+def fragment(request, posts, archived=None):
+    """Следующая порция карточек постов без общего макета страницы.
+
+    Курсор продолжения приходит в заголовке X-Next-Cursor и в ссылке
+    «Показать еще» внутри фрагмента.
+    """
+    cursor = request.GET.get('after')
+    try:
+        position = cursors.decode(cursor) if cursor else None
+    except ValueError:
+        return HttpResponseBadRequest()
+    limit = settings.POSTS_PER_PAGE
+    if isinstance(posts, feed.Feed):
+        page = posts.after(position, limit + 1)
+    else:
+        page = list(cursors.after(posts, position)[:limit + 1])
+    if archived is not None and len(page) <= limit:
+        # Архивные посты старше всех свежих, поэтому лента продолжается
+        # в архиве с той же позиции.
+        page += cursors.after(archived, position)[:limit + 1 - len(page)]
+    next_cursor = None
+    if len(page) > limit:
+        next_cursor = cursors.encode(page[limit - 1])
+    context = {
+        'posts': page[:limit],
+        'next_url': next_cursor and f'{request.path}?after={next_cursor}',
+    }
+    response = render(request, 'posts/fragments/posts.html', context)
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def index_fragment(request):
+    return fragment(request, Post.objects.select_related('author', 'group'))
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return fragment(
+        request,
+        group.posts.select_related('author', 'group'),
+        group.archived_posts.select_related('author', 'group'),
+    )
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    return fragment(
+        request,
+        author.posts.select_related('author', 'group'),
+        author.archived_posts.select_related('author', 'group'),
+    )
+
+
+@login_required
+def follow_fragment(request):
+    return fragment(
+        request, feed.following(follow_graph.following_ids(request.user.pk))
+    )
+
+
+@login_required
+def group_follow_fragment(request):
+    return fragment(request, feed.groups(followed_groups(request.user)))
+
+
+def new_posts(request, newest, posts):
+    """Число и карточки постов новее since для опроса ленты.
+
+    newest - закэшированный id последнего поста ленты: пока он не больше
+    since, ответ строится без обращения к БД. posts вызывается, только
+    если новые посты есть; latest в ответе - наибольший id отданных
+    постов.
+    """
+    try:
+        since = int(request.GET.get('since', newest))
+    except ValueError:
+        return HttpResponseBadRequest()
+    if newest <= since:
+        return JsonResponse({'count': 0, 'latest': newest, 'html': ''})
+    newer = posts().filter(pk__gt=since).select_related('author', 'group')
+    count = newer.count()
+    page = list(newer[:settings.POSTS_PER_PAGE])
+    html = render_to_string('posts/fragments/posts.html', {
+        'posts': page,
+    }, request)
+    # Клиент продолжит с последнего полученного поста, а не с
+    # закэшированного id: пост может быть еще не виден в БД.
+    return JsonResponse({
+        'count': count,
+        'latest': max((post.pk for post in page), default=since),
+        'html': html,
+    })
+
+
+def index_new(request):
+    return new_posts(request, latest.index_latest(), Post.objects.all)
+
+
+def group_new(request, slug):
+    group_id = latest.group_id(slug)
+    if group_id is None:
+        raise Http404
+    return new_posts(
+        request, latest.group_latest(group_id),
+        lambda: Post.objects.filter(group_id=group_id)
+    )
+
+
+@login_required
+def follow_new(request):
+    author_ids = follow_graph.following_ids(request.user.pk)
+    return new_posts(
+        request, latest.authors_latest(author_ids),
+        lambda: Post.objects.filter(author_id__in=list(author_ids))
+    )
+
+
+def group_events(request, slug):
+    group_id = latest.group_id(slug)
+    if group_id is None:
+        raise Http404
+    return sse.stream(request, [live.group_channel(group_id)])
+
+
+def author_events(request, username):
+    author = get_object_or_404(User, username=username)
+    return sse.stream(request, [live.author_channel(author.pk)])
+
+
+@login_required
+def follow_events(request):
+    return sse.stream(request, [
+        live.author_channel(author_id)
+        for author_id in follow_graph.following_ids(request.user.pk)
+    ])
+
+
+def comment_events(request, post_id):
+    if not comment_buffer.post_exists(post_id):
+        raise Http404
+    return sse.stream(request, [live.comments_channel(post_id)])
@@ -0,0 +1,232 @@
+"""Закэшированные окна последних постов групп.
+
+Окно группы - до GROUP_WINDOW_SIZE пар (pub_date в микросекундах, id)
+ее последних постов по убыванию, упакованных в array('q'). Сигналы
+после коммита обновляют окна при создании, переносе и удалении постов
+(см. _update), поэтому лента подписок на группы сливается из окон
+одним get_many, а посты читаются одним in_bulk. Только страницы
+глубже окон дочитываются из БД источниками posts/feed.py.
+"""
+import datetime as dt
+import heapq
+from array import array
+from itertools import islice, takewhile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import feed
+from .page_cache import hydrate
+from .models import Post
+
+
+def window_key(group_id):
+    return f'posts:window:group:{group_id}'
+
+
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def timestamp(pub_date):
+    """pub_date в целых микросекундах: так пары сравниваются точно."""
+    return (pub_date - EPOCH) // dt.timedelta(microseconds=1)
+
+
+def pub_date(timestamp):
+    return EPOCH + dt.timedelta(microseconds=timestamp)
+
+
+def version_key(group_id):
+    return f'posts:window:version:{group_id}'
+
+
+def _pack(version, complete, entries):
+    values = array('q')
+    for entry in entries:
+        values.extend(entry)
+    return version, complete, values.tobytes()
+
+
+def _unpack(value):
+    """(версия, полное ли окно, список пар (timestamp, id))."""
+    version, complete, data = value
+    values = array('q')
+    values.frombytes(data)
+    return version, complete, list(zip(values[::2], values[1::2]))
+
+
+def _load(group_id):
+    size = settings.GROUP_WINDOW_SIZE
+    entries = [
+        (timestamp(date), pk) for date, pk in
+        Post.objects.filter(group_id=group_id).order_by(
+            '-pub_date', '-pk'
+        ).values_list('pub_date', 'pk')[:size + 1]
+    ]
+    # Окно полное, если в группе нет постов старше его последнего.
+    return len(entries) <= size, entries[:size]
+
+
+def _version(group_id):
+    key = version_key(group_id)
+    cache.add(key, 0, settings.GROUP_WINDOW_TIMEOUT)
+    return cache.get(key, 0)
+
+
+def windows(group_ids):
+    """{id группы: (полное ли окно, пары (timestamp, id))}.
+
+    Окно верно, только если его версия совпадает с текущей версией
+    группы; иначе оно перечитывается из БД. Версия берется до чтения,
+    так что изменение во время чтения сделает окно устаревшим.
+    """
+    keys = {window_key(group_id): group_id for group_id in group_ids}
+    versions = {version_key(group_id): group_id for group_id in group_ids}
+    cached = cache.get_many([*keys, *versions])
+    found = {}
+    for key, group_id in keys.items():
+        value = cached.get(key)
+        version = cached.get(version_key(group_id))
+        if value is not None and version is not None and value[0] == version:
+            found[group_id] = _unpack(value)[1:]
+    missing = {}
+    for group_id in group_ids:
+        if group_id not in found:
+            version = _version(group_id)
+            found[group_id] = _load(group_id)
+            missing[window_key(group_id)] = _pack(version, *found[group_id])
+    if missing:
+        cache.set_many(missing, settings.GROUP_WINDOW_TIMEOUT)
+    return found
+
+
+def _bump(group_id):
+    """Новая версия группы или None, если счетчик версии потерян."""
+    key = version_key(group_id)
+    cache.add(key, 0, settings.GROUP_WINDOW_TIMEOUT)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return None
+
+
+def _update(group_id, change):
+    """Правит окно, если с момента его чтения не было других правок.
+
+    Версия увеличивается атомарно: если окно отстает больше чем на
+    одну версию, его одновременно правил кто-то еще, и окно просто
+    удаляется - его перечитают из БД.
+    """
+    version = _bump(group_id)
+    value = cache.get(window_key(group_id))
+    if value is None or version is None or value[0] != version - 1:
+        cache.delete(window_key(group_id))
+        return
+    complete, entries = change(*_unpack(value)[1:])
+    cache.set(window_key(group_id), _pack(version, complete, entries),
+              settings.GROUP_WINDOW_TIMEOUT)
+
+
+def add(group_id, post):
+    entry = (timestamp(post.pub_date), post.pk)
+
+    def change(complete, entries):
+        if entry in entries:
+            return complete, entries
+        if not complete and entries and entry < entries[-1]:
+            # Пост старше окна, а постов между ними окно не знает.
+            return complete, entries
+        entries = sorted(entries + [entry], reverse=True)
+        if len(entries) > settings.GROUP_WINDOW_SIZE:
+            return False, entries[:settings.GROUP_WINDOW_SIZE]
+        return complete, entries
+    _update(group_id, change)
+
+
+def remove(group_id, post_id):
+    def change(complete, entries):
+        return complete, [entry for entry in entries if entry[1] != post_id]
+    _update(group_id, change)
+
+
+def post_saved(post, created, old_group_id=None):
+    """Правит окна после коммита, чтобы откат не оставил лишний id."""
+    if not created and old_group_id == post.group_id:
+        return
+
+    def apply():
+        if old_group_id is not None:
+            remove(old_group_id, post.pk)
+        if post.group_id is not None:
+            add(post.group_id, post)
+    transaction.on_commit(apply)
+
+
+def post_deleted(post):
+    group_id, post_id = post.group_id, post.pk
+    if group_id is not None:
+        transaction.on_commit(lambda: remove(group_id, post_id))
+
+
+def invalidate(*group_ids):
+    def apply():
+        for group_id in group_ids:
+            _bump(group_id)
+        cache.delete_many([window_key(group_id) for group_id in group_ids])
+    transaction.on_commit(apply)
+
+
+class GroupFeed(feed.Feed):
+    """Лента подписок на группы: сначала окна, затем источники из БД."""
+
+    def __init__(self, group_ids):
+        self.group_ids = list(group_ids)
+        base = feed.groups(self.group_ids)
+        super().__init__(base.querysets, base.counter)
+
+    def entries(self):
+        """Слитые окна, пока их порядок совпадает с порядком ленты.
+
+        После последнего поста неполного окна могут идти посты его
+        группы, которых в кэше нет, поэтому слияние обрезается на самом
+        новом из последних постов неполных окон. Возвращает пары и
+        признак того, что в них вся лента.
+        """
+        found = windows(self.group_ids)
+        incomplete = [entries for complete, entries in found.values()
+                      if not complete]
+        if any(not entries for entries in incomplete):
+            return [], False
+        boundary = max((entries[-1] for entries in incomplete), default=None)
+        merged = heapq.merge(
+            *(entries for complete, entries in found.values()),
+            reverse=True
+        )
+        if boundary is None:
+            return list(merged), True
+        return [
+            entry for entry in takewhile(lambda entry: entry >= boundary,
+                                         merged)
+        ], False
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Feed поддерживает только срезы')
+        start, stop = index.start or 0, index.stop
+        entries, complete = self.entries()
+        posts = hydrate([pk for _, pk in entries[start:stop]])
+        if complete or (stop is not None and stop <= len(entries)):
+            return posts
+        # Страница глубже окон: дочитываем источники после окон.
+        position = None
+        if entries:
+            position = pub_date(entries[-1][0]), entries[-1][1]
+        stop = None if stop is None else stop - len(entries)
+        batch_size = settings.FEED_BATCH_SIZE
+        if stop is not None:
+            batch_size = max(min(batch_size, stop), 1)
+        return posts + list(islice(
+            self.posts(position, batch_size),
+            max(start - len(entries), 0), stop
+        ))
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'created',
+        'attempts',
+        'sent',
+    )
+    list_filter = ('sent',)
+    search_fields = ('recipients', 'subject')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,49 @@
+"""Загрузка пользователя из кэша.
+
+AuthenticationMiddleware на каждом запросе читает пользователя из БД.
+CachedModelBackend хранит в кэше компактную запись - кортеж значений
+полей модели, включая хэш пароля, нужный для проверки сессии. Запись
+сбрасывается при сохранении пользователя (в том числе при смене пароля)
+и при выходе.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+User = get_user_model()
+
+
+def user_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def field_names():
+    return [field.attname for field in User._meta.concrete_fields]
+
+
+def dump(user):
+    return tuple(getattr(user, name) for name in field_names())
+
+
+def load(record):
+    return User.from_db(User.objects.db, field_names(), record)
+
+
+def invalidate(user_id):
+    cache.delete(user_key(user_id), version=settings.USER_CACHE_VERSION)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        record = cache.get(key, version=settings.USER_CACHE_VERSION)
+        if record is not None:
+            user = load(record)
+        else:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, dump(user), settings.USER_CACHE_TIMEOUT,
+                      version=settings.USER_CACHE_VERSION)
+        return user if self.user_can_authenticate(user) else None
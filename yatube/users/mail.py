@@ -0,0 +1,138 @@
+"""Исходящая почта через таблицу OutboxMessage.
+
+OutboxBackend подключается как EMAIL_BACKEND: письма не отправляются
+в запросе, а сохраняются в таблицу. Команда send_outbox забирает их
+пачками и отправляет через одно соединение OUTBOX_EMAIL_BACKEND.
+Неудачные попытки повторяются с экспоненциальной задержкой.
+
+Сохраняются получатели To, Cc и Bcc по отдельности, Reply-To, заголовки
+и HTML-версия. Письма с вложениями или другими альтернативами таблица
+сохранить не может, такие письма отклоняются с ValueError.
+"""
+import datetime as dt
+import json
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def dump_headers(headers):
+    return json.dumps(headers, ensure_ascii=False) if headers else ''
+
+
+class OutboxBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        rows = []
+        for message in email_messages:
+            if message.attachments:
+                raise ValueError('Вложения через OutboxBackend не отправить')
+            html = ''
+            for content, mimetype in getattr(message, 'alternatives', ()):
+                if mimetype != 'text/html' or html:
+                    raise ValueError(
+                        f'Альтернатива {mimetype} не поддерживается'
+                    )
+                html = content
+            rows.append(OutboxMessage(
+                subject=message.subject,
+                body=message.body,
+                html_body=html,
+                from_email=message.from_email,
+                recipients='\n'.join(message.to),
+                cc='\n'.join(message.cc),
+                bcc='\n'.join(message.bcc),
+                reply_to='\n'.join(message.reply_to),
+                headers=dump_headers(message.extra_headers),
+                next_attempt=now,
+            ))
+        OutboxMessage.objects.bulk_create(rows)
+        return len(rows)
+
+
+def addresses(value):
+    return value.split('\n') if value else []
+
+
+def build_message(row, connection):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=addresses(row.recipients),
+        cc=addresses(row.cc),
+        bcc=addresses(row.bcc),
+        reply_to=addresses(row.reply_to),
+        headers=json.loads(row.headers) if row.headers else None,
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    return dt.timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def fail(row, error, now):
+    row.attempts += 1
+    row.next_attempt = now + retry_delay(row.attempts)
+    row.last_error = repr(error)
+
+
+def deliver(batch_size=None):
+    """Отправляет пачку готовых писем, возвращает (отправлено, ошибок).
+
+    Рассчитано на один работающий экземпляр send_outbox.
+    """
+    now = timezone.now()
+    rows = list(OutboxMessage.objects.filter(
+        sent__isnull=True,
+        next_attempt__lte=now,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )[:batch_size or settings.OUTBOX_BATCH_SIZE])
+    if not rows:
+        return 0, 0
+
+    sent, failed = [], []
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        # Сервер недоступен: откладываем всю пачку, а не роняем команду.
+        logger.warning('Не удалось подключиться для отправки почты: %s',
+                       error)
+        for row in rows:
+            fail(row, error, now)
+        OutboxMessage.objects.bulk_update(
+            rows, ['attempts', 'next_attempt', 'last_error']
+        )
+        return 0, len(rows)
+    try:
+        for row in rows:
+            try:
+                build_message(row, connection).send()
+            except Exception as error:
+                logger.warning('Письмо %s не отправлено: %s', row.pk, error)
+                fail(row, error, now)
+                failed.append(row)
+            else:
+                row.attempts += 1
+                row.sent = timezone.now()
+                sent.append(row)
+    finally:
+        connection.close()
+        OutboxMessage.objects.bulk_update(
+            sent + failed, ['attempts', 'sent', 'next_attempt', 'last_error']
+        )
+    return len(sent), len(failed)
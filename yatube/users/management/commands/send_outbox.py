@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.mail import deliver
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из таблицы исходящих'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а опрашивать таблицу каждые --interval с'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            while True:
+                sent, failed = deliver(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, с ошибкой: {failed}'
+                    )
+                if sent + failed < options['batch_size']:
+                    break
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
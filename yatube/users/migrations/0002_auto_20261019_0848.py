@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='bcc',
+            field=models.TextField(blank=True, verbose_name='Скрытая копия'),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='cc',
+            field=models.TextField(blank=True, verbose_name='Копия'),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='headers',
+            field=models.TextField(blank=True, verbose_name='Заголовки'),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='reply_to',
+            field=models.TextField(blank=True, verbose_name='Ответить'),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='recipients',
+            field=models.TextField(verbose_name='Кому'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox."""
+    subject = models.TextField('Тема')
+    body = models.TextField('Текст')
+    html_body = models.TextField('HTML', blank=True)
+    from_email = models.CharField('Отправитель', max_length=254)
+    # Адреса через перевод строки.
+    recipients = models.TextField('Кому')
+    cc = models.TextField('Копия', blank=True)
+    bcc = models.TextField('Скрытая копия', blank=True)
+    reply_to = models.TextField('Ответить', blank=True)
+    # Дополнительные заголовки письма в JSON.
+    headers = models.TextField('Заголовки', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt = models.DateTimeField('Следующая попытка', db_index=True)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return self.subject
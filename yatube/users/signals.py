@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    # Сюда попадают и смена пароля, и обновление last_login при входе.
+    backends.invalidate(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        backends.invalidate(user.pk)
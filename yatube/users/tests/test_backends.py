@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import backends
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='HasNoName', password='old-password-123'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='HasNoName', password='old-password-123')
+        self.url = reverse('about:author')
+
+    def test_no_queries_when_cached(self):
+        """Повторный запрос не читает сессию и пользователя из БД"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_old_sessions_stay_valid(self):
+        """Сессии со старым ModelBackend не разлогиниваются"""
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = (
+            'django.contrib.auth.backends.ModelBackend'
+        )
+        session.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_record_matches_user(self):
+        """Пользователь из кэша совпадает с пользователем из БД"""
+        backend = backends.CachedModelBackend()
+        backend.get_user(self.user.pk)
+        cached = backend.get_user(self.user.pk)
+        self.assertEqual(backends.dump(cached), backends.dump(
+            User.objects.get(pk=self.user.pk)
+        ))
+        self.assertFalse(cached._state.adding)
+
+    def test_password_change_invalidates(self):
+        """После смены пароля старые сессии не проходят проверку"""
+        self.client.get(self.url)
+        other = Client()
+        other.login(username='HasNoName', password='old-password-123')
+        response = other.post(reverse('users:password_change'), {
+            'old_password': 'old-password-123',
+            'new_password1': 'new-password-456',
+            'new_password2': 'new-password-456',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+        response = other.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_logout_invalidates(self):
+        """Выход удаляет запись пользователя из кэша"""
+        self.client.get(self.url)
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(
+            backends.user_key(self.user.pk),
+            version=settings.USER_CACHE_VERSION
+        ))
@@ -0,0 +1,128 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import mail as outbox
+from ..models import OutboxMessage
+
+User = get_user_model()
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise ConnectionError('SMTP недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='HasNoName', email='user@example.com',
+            password='Sup3r-secret-pass'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля сохраняется, а не отправляется в запросе"""
+        self.guest_client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipients, 'user@example.com')
+
+    def test_signup_welcome_is_queued(self):
+        """При регистрации в очередь ставится приветственное письмо"""
+        self.guest_client.post(reverse('users:signup'), {
+            'username': 'new-user',
+            'email': 'new@example.com',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        })
+        self.assertEqual(
+            OutboxMessage.objects.get().recipients, 'new@example.com'
+        )
+
+    def test_worker_sends_batch(self):
+        """Команда отправляет все письма и отмечает их отправленными"""
+        for n in range(3):
+            mail.send_mail(f'Тема {n}', 'Текст', None, ['user@example.com'])
+        call_command('send_outbox', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            OutboxMessage.objects.filter(sent__isnull=True).exists()
+        )
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND='users.tests.test_outbox.FailingBackend',
+        OUTBOX_RETRY_DELAY=60,
+    )
+    def test_failure_backs_off(self):
+        """Неудачная отправка откладывается с растущей задержкой"""
+        mail.send_mail('Тема', 'Текст', None, ['user@example.com'])
+        self.assertEqual(outbox.deliver(), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('SMTP', message.last_error)
+        self.assertGreater(message.next_attempt, timezone.now())
+        self.assertEqual(outbox.deliver(), (0, 0))
+        self.assertEqual(
+            outbox.retry_delay(3).total_seconds(),
+            4 * outbox.retry_delay(1).total_seconds()
+        )
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND='users.tests.test_outbox.UnreachableBackend',
+    )
+    def test_connection_failure_backs_off(self):
+        """Недоступный сервер откладывает всю пачку без исключения"""
+        for n in range(2):
+            mail.send_mail(f'Тема {n}', 'Текст', None, ['user@example.com'])
+        self.assertEqual(outbox.deliver(), (0, 2))
+        for message in OutboxMessage.objects.all():
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt, timezone.now())
+
+    def test_bcc_not_disclosed(self):
+        """Скрытая копия доходит, но не попадает в заголовки"""
+        EmailMessage(
+            'Тема', 'Текст', None, ['to@example.com'],
+            cc=['cc@example.com'], bcc=['secret@example.com'],
+            reply_to=['reply@example.com'], headers={'X-Tag': 'welcome'},
+        ).send()
+        outbox.deliver()
+        message = mail.outbox[0]
+        self.assertIn('secret@example.com', message.recipients())
+        headers = message.message().as_string()
+        self.assertNotIn('secret@example.com', headers)
+        self.assertIn('cc@example.com', message.message()['Cc'])
+        self.assertEqual(message.message()['Reply-To'], 'reply@example.com')
+        self.assertEqual(message.message()['X-Tag'], 'welcome')
+
+    def test_attachments_rejected(self):
+        """Письмо с вложением не сохраняется молча без вложения"""
+        message = EmailMessage('Тема', 'Текст', None, ['to@example.com'])
+        message.attach('file.txt', 'data', 'text/plain')
+        with self.assertRaises(ValueError):
+            message.send()
+        self.assertFalse(OutboxMessage.objects.exists())
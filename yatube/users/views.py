@@ -1,3 +1,5 @@
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.views.generic import CreateView
 
 from django.urls import reverse_lazy
@@ -9,3 +11,17 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.object.email:
+            # Письмо ставится в очередь исходящих, см. users/mail.py.
+            send_mail(
+                'Добро пожаловать в Yatube',
+                render_to_string(
+                    'users/signup_email.txt', {'user': self.object}
+                ),
+                None,
+                [self.object.email],
+            )
+        return response
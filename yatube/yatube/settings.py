@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -50,21 +51,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.slow_queries.SlowQueryMiddleware',
+    'core.middleware.timing.ServerTimingMiddleware',
+    'core.middleware.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.profiler.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Сессии читаются из кэша и пишутся в БД только при изменении.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# ModelBackend остается вторым: сессии, созданные до CachedModelBackend,
+# хранят его путь и без него разлогинились бы.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -130,21 +147,152 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60 * 60
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в таблицу исходящих и отправляются командой
+# send_outbox через OUTBOX_EMAIL_BACKEND.
+EMAIL_BACKEND = 'users.mail.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+# Задержка перед повтором удваивается с каждой неудачной попыткой.
+OUTBOX_RETRY_DELAY = 60
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_IMMUTABLE_PREFIXES = ('cache/',)
+# Внутренний location фронтового прокси, например '/protected-media/'.
+# Если задан, файлы отдает прокси по заголовку MEDIA_ACCEL_HEADER.
+MEDIA_ACCEL_REDIRECT = None
+MEDIA_ACCEL_HEADER = 'X-Accel-Redirect'
+
+POSTS_PER_PAGE = 10
+# Счетчики постов сбрасываются сигналами, таймаут страхует
+# от bulk-операций, которые сигналы не отправляют.
+POST_COUNT_TIMEOUT = 60 * 10
+# Сколько первых страниц лент кэшировать списками id, см.
+# posts/page_cache.py. Страницы живут и сбрасываются вместе со счетчиками.
+PAGE_CACHE_PAGES = 3
+
+# id последнего поста каждой ленты для опроса новых постов.
+LATEST_POST_TIMEOUT = 60 * 60
+
+# Смена версии сбрасывает закэшированный граф подписок.
+FOLLOW_GRAPH_VERSION = 1
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+SUGGESTIONS_SHOWN = 5
+
+# Ленты подписок сливаются из источников по авторам и группам,
+# см. posts/feed.py: размер пачки чтения источника и предел числа
+# источников (запросов) на страницу. Страница номер N читает из каждого
+# источника до N страниц постов, поэтому номера страниц ограничены
+# FEED_MAX_PAGES, глубже лента читается фрагментами с курсором.
+FEED_BATCH_SIZE = 20
+FEED_MAX_STREAMS = 20
+FEED_MAX_PAGES = 20
+# Окна последних постов групп для ленты подписок на группы,
+# см. posts/windows.py.
+GROUP_WINDOW_SIZE = 50
+GROUP_WINDOW_TIMEOUT = 60 * 60 * 24
+
+# Вес комментария вдвое падает за TRENDING_HALF_LIFE секунд.
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_SIZE = 100
+TRENDING_SHOWN = 20
+# Оценки пересчитываются из новых комментариев каждые
+# TRENDING_PERSIST_EVERY комментариев (одна пачка в
+# TRENDING_PERSIST_CHUNK комментариев после коммита) и командой
+# persist_trending, которая учитывает все накопленное.
+TRENDING_PERSIST_EVERY = 50
+TRENDING_PERSIST_CHUNK = 500
+TRENDING_TOP_TIMEOUT = 60 * 10
+
+# Заголовок Server-Timing с разбивкой по SQL, шаблонам, кэшу и миниатюрам
+# отдается всем клиентам только при отладке, иначе - лишь сотрудникам.
+# SERVER_TIMING_LOG дублирует замеры строкой JSON в лог core.timing.
+SERVER_TIMING_HEADER = DEBUG
+SERVER_TIMING_LOG = False
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+
+# Метрики Prometheus: каждый процесс пишет свой файл в METRICS_DIR,
+# /metrics складывает их. Каталог очищается при перезапуске сервиса.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+METRICS_FLUSH_INTERVAL = 1
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Профилирование запросов, см. core/profiling.py. Доли запросов
+# по именам URL, например {'posts:follow_index': 0.01}.
+PROFILE_SAMPLE_RATES = {}
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'yatube-profiles')
+PROFILE_TEXT_LIMIT = 60
+
+# Запросы дольше порога (в секундах) попадают в журнал SlowQuery.
+SLOW_QUERY_THRESHOLD = 0.1
+
+# Сколько секунд админка использует посчитанное число строк.
+ADMIN_COUNT_TIMEOUT = 60
+
+# Массовые действия из админки, см. posts/bulk_jobs.py.
+BULK_JOB_CHUNK_SIZE = 200
+BULK_JOB_DUTY_CYCLE = 0.25
+# Через сколько секунд без прогресса выполняемое задание считается
+# брошенным и его может забрать другой исполнитель.
+BULK_JOB_STALE_AFTER = 600
+
+# Посты старше ARCHIVE_AFTER_DAYS переносит в архив команда archive_posts.
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+# Смена версии сбрасывает закэшированных пользователей.
+USER_CACHE_VERSION = 1
+USER_CACHE_TIMEOUT = 60 * 60
+
+RATELIMIT_ENABLED = True
+# Доверять X-Forwarded-For, только если перед приложением стоит свой прокси.
+RATELIMIT_TRUST_FORWARDED = False
+RATELIMITS = {
+    'posts:post_create': {'rate': '10/m', 'methods': ('POST',)},
+    'posts:add_comment': {'rate': '20/m', 'methods': ('POST',)},
+    'posts:profile_follow': {'rate': '30/m'},
+    'posts:profile_unfollow': {'rate': '30/m'},
+}
+
+# Потоки SSE о новых постах и комментариях, см. core/pubsub.py.
+# 'local' - события только внутри процесса, без id и досылки
+# пропущенного по Last-Event-ID; 'sqlite' - общий файл SSE_BROKER_PATH
+# для нескольких процессов, с досылкой.
+SSE_BROKER = 'local'
+SSE_BROKER_PATH = os.path.join(tempfile.gettempdir(), 'yatube-events.sqlite3')
+SSE_POLL_INTERVAL = 0.5
+SSE_RETENTION = 60 * 60
+SSE_HEARTBEAT = 15
+SSE_RETRY_MS = 5000
+SSE_MAX_DURATION = 60 * 5
+SSE_QUEUE_SIZE = 100
+SSE_MAX_CONNECTIONS = 100
+
+# Отложенная запись комментариев пачками, см. posts/comment_buffer.py.
+COMMENT_WRITE_BEHIND = False
+COMMENT_FLUSHER_THREAD = True
+COMMENT_FLUSH_INTERVAL = 0.005
+COMMENT_FLUSH_BATCH = 100
+COMMENT_POST_EXISTS_TIMEOUT = 60
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TimedLocMemCache',
     }
 }